@@ -3,29 +3,121 @@ AI Job Analysis Module
 Uses Claude API to analyze job relevance and score matches
 """
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import json
+import re
+import time
+
+
+MODEL = "claude-sonnet-4-5-20250929"
+PROMPT_VERSION = "v2"  # Bump when the analysis prompt changes to invalidate cached responses
+CACHE_TTL_SECONDS = 604800  # 7 days
+
+BATCH_MAX_REQUESTS = 10000  # Anthropic limit per message batch
+BATCH_POLL_INITIAL_SECONDS = 30
+BATCH_POLL_MAX_SECONDS = 300
+
+DESCRIPTION_TOKEN_BUDGET = 700  # Job description tokens sent to Claude
+CHARS_PER_TOKEN = 4  # Estimate used when tiktoken isn't installed
+
+SEMANTIC_MODEL = "all-MiniLM-L6-v2"  # 384-d sentence embeddings, CPU-friendly
+SEMANTIC_THRESHOLD = 0.93  # Cosine similarity needed to reuse another job's analysis
+SEMANTIC_DESCRIPTION_TOKENS = 500
+
+DEFAULT_MAX_CONCURRENCY = 16
+API_MAX_RETRIES = 5  # SDK retries 429/5xx with exponential backoff, honouring Retry-After
+RESPONSE_MAX_TOKENS = 512  # The analysis JSON is ~200 tokens
+FALLBACK_MAX_TOKENS = 1000  # Non-streaming retry when the streamed JSON doesn't parse
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _compile_keywords(keywords) -> re.Pattern:
+    """
+    Compile keywords into a single alternation regex (one pass over the text)
+
+    The lookahead makes findall() report overlapping keywords too, so
+    "ai hardware" and "hardware" are both found in the same text.
+    """
+    if not keywords:
+        return re.compile(r'(?!)')  # Never matches
+    alternation = '|'.join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+    return re.compile(f'(?=({alternation}))')
+
+
+# Rule-based scoring keywords (all lowercase, matched as substrings)
+_PM_TITLE_RE = _compile_keywords(('product manager', 'product lead', 'project manager', 'program manager', 'pm ', 'tpm'))
+_TECHNICAL_PM_RE = _compile_keywords(('technical', 'hardware', 'platform', 'infrastructure', 'engineering'))
+_VC_TITLE_RE = _compile_keywords(('venture', 'vc', 'investment analyst', 'investment associate',
+                                  'principal - investment', 'principal investor'))
+_INDUSTRY_KEYWORDS = ('robotics', 'autonomous', 'ai hardware', 'chip', 'semiconductor', 'soc', 'vlsi',
+                      'deep tech', 'hardware', 'edge ai')
+_INDUSTRY_RE = _compile_keywords(_INDUSTRY_KEYWORDS)
+_TECH_RE = _compile_keywords(('vlsi', 'soc', 'risc-v', 'hardware', 'chip', 'technical background', 'engineering degree'))
+# Location match - STRICT: London, UK, and nearby UK cities ONLY
+_UK_RE = _compile_keywords(('london', 'cambridge', 'bristol', 'oxford', 'manchester', 'edinburgh',
+                            'glasgow', 'birmingham', 'uk', 'united kingdom', 'remote', 'hybrid'))
+_REJECT_RE = _compile_keywords(('austin', 'texas', 'us ', 'usa', 'united states', 'california', 'new york',
+                                'bengaluru', 'bangalore', 'india', 'china', 'singapore', 'taiwan', 'hsinchu',
+                                'milpitas', 'san francisco', 'seattle'))
+_COMPANY_INDUSTRY_RE = _compile_keywords(('robotics', 'ai', 'semiconductor', 'deep tech'))
 
 
 class JobAnalyzer:
     """Analyzes job descriptions and scores relevance using AI"""
 
-    def __init__(self, api_key: str, config: Dict, user_profile: Dict = None):
-        """Initialize Claude API client"""
+    # Per-job half of the prompt; the static half is built once in __init__
+    _JOB_PROMPT_TEMPLATE = """Analyze this job posting for relevance to the candidate profile above.
+
+JOB POSTING:
+{company_info}
+Title: {title}
+Location: {location}
+Description:
+{description}
+"""
+
+    def __init__(self, api_key: str, config: Dict, user_profile: Dict = None, db=None):
+        """Initialize Claude API client (db is an optional JobDatabase used as response cache)"""
         self.api_key = api_key
         self.config = config
+        self.db = db
         self.criteria = config.get('criteria', {})
         self.matching_config = config.get('matching', {})
         self.use_ai = self.matching_config.get('use_ai', True)
+        self.prefilter = self.matching_config.get('prefilter', True)
 
         # User profile for matching
         self.user_profile = user_profile or self._default_profile()
 
+        # The profile never changes after init - serialize it once
+        self._profile_json = json.dumps(self.user_profile, indent=2)
+
+        # Job-independent prompt prefix, sent with cache_control so Claude reuses it
+        self._static_prompt = self._build_static_prompt()
+
+        # Cache keys share a hashed prefix (model, prompt version, profile); copied per job
+        self._cache_key_base = hashlib.sha256(
+            json.dumps([MODEL, PROMPT_VERSION, self._profile_json]).encode('utf-8'))
+
+        # Tokenizer for description truncation (optional - falls back to a char estimate)
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            self._encoding = None
+
+        # Exclude keywords come from config, so compile them per instance
+        self._exclude_re = _compile_keywords([kw.lower() for kw in self.criteria.get('keywords_exclude', [])])
+
         # Import Anthropic only if API key is provided
         if api_key and api_key != "YOUR_ANTHROPIC_API_KEY_HERE" and self.use_ai:
             try:
                 import anthropic
-                self.client = anthropic.Anthropic(api_key=api_key)
+                self.client = anthropic.Anthropic(api_key=api_key, max_retries=API_MAX_RETRIES)
                 self.enabled = True
             except ImportError:
                 print("Warning: anthropic package not installed. Run: pip install anthropic")
@@ -37,6 +129,17 @@ class JobAnalyzer:
             if self.use_ai:
                 print("Claude API key not configured. Using rule-based matching.")
 
+        # Optional semantic cache: reuse analyses of re-worded duplicate postings
+        self._embedder = None
+        self._pending_embeddings = {}  # cache_key -> (vector, guard) awaiting a Claude response
+        self.semantic_threshold = self.matching_config.get('semantic_threshold', SEMANTIC_THRESHOLD)
+        if self.enabled and self.db and self.matching_config.get('semantic_cache', False):
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._embedder = SentenceTransformer(SEMANTIC_MODEL)
+            except ImportError:
+                print("Warning: sentence-transformers not installed. Run: pip install sentence-transformers")
+
     def _default_profile(self) -> Dict:
         """Default user profile (Ido's background)"""
         return {
@@ -81,46 +184,358 @@ class JobAnalyzer:
         else:
             return self._rule_based_analyze(job, company)
 
+    def _cache_key(self, job: Dict, company: Dict = None) -> str:
+        """Hash everything that influences the AI response into a cache key"""
+        payload = json.dumps({
+            "title": job['title'],
+            "location": job.get('location'),
+            "desc": self._truncate_description(job.get('description') or ''),
+            "company": company and company['name']
+        }, sort_keys=True)
+
+        key = self._cache_key_base.copy()
+        key.update(payload.encode('utf-8'))
+        return key.hexdigest()
+
+    def _get_cached_analysis(self, cache_key: str) -> Optional[Dict]:
+        """Return a cached analysis if the database has a live entry"""
+        if not self.db:
+            return None
+
+        cached = self.db.get_cached_analysis(cache_key)
+        if not cached:
+            return None
+
+        try:
+            return json.loads(cached)
+        except json.JSONDecodeError:
+            return None  # Corrupt entry, re-analyze and overwrite
+
+    def _save_cached_analysis(self, cache_key: str, response_text: str):
+        """Store a raw Claude response in the exact (and, if enabled, semantic) cache"""
+        if not self.db:
+            return
+
+        self.db.save_cached_analysis(cache_key, MODEL, PROMPT_VERSION,
+                                     response_text, CACHE_TTL_SECONDS)
+
+        pending = self._pending_embeddings.pop(cache_key, None)
+        if pending:
+            vector, guard = pending
+            self.db.save_semantic_cache_entry(cache_key, guard, vector.tobytes(),
+                                              response_text, CACHE_TTL_SECONDS)
+
+    def _lookup_cache(self, cache_key: str, job: Dict, company: Dict = None) -> Optional[Dict]:
+        """Check the exact cache, then the semantic cache"""
+        return self._get_cached_analysis(cache_key) or self._get_similar_analysis(cache_key, job, company)
+
+    def _lexical_guard(self, job: Dict, company: Dict = None) -> str:
+        """
+        Bucket for semantic matches: role type, location, company and excluded keywords
+
+        Embeddings alone would happily match "PM - London" with "PM - Austin";
+        only jobs in the same bucket may share an analysis.
+        """
+        title_lower = job['title'].lower()
+        if _PM_TITLE_RE.search(title_lower):
+            role_type = "pm"
+        elif _VC_TITLE_RE.search(title_lower):
+            role_type = "vc"
+        else:
+            role_type = "other"
+
+        location = _WHITESPACE_RE.sub(' ', (job.get('location') or '').lower()).strip()
+        excluded = sorted(set(self._exclude_re.findall(title_lower)))
+        return json.dumps([role_type, location, company and company['name'], excluded])
+
+    def _get_similar_analysis(self, cache_key: str, job: Dict, company: Dict = None) -> Optional[Dict]:
+        """Return the analysis of a near-duplicate job, if the semantic cache is enabled"""
+        if not self._embedder:
+            return None
+
+        import numpy as np
+
+        text = job['title'] + ' ' + self._truncate_description(job.get('description') or '',
+                                                               SEMANTIC_DESCRIPTION_TOKENS)
+        vector = self._embedder.encode([text], normalize_embeddings=True)[0].astype(np.float32)
+        guard = self._lexical_guard(job, company)
+
+        entries = self.db.get_semantic_cache_entries(guard)
+        if entries:
+            # Flat inner-product search (vectors are normalized, so dot = cosine)
+            matrix = np.frombuffer(b''.join(e[0] for e in entries), dtype=np.float32).reshape(len(entries), -1)
+            similarities = matrix @ vector
+            best = int(similarities.argmax())
+
+            if similarities[best] >= self.semantic_threshold:
+                try:
+                    analysis = json.loads(entries[best][1])
+                    self._save_cached_analysis(cache_key, entries[best][1])  # Exact hit next time
+                    return analysis
+                except json.JSONDecodeError:
+                    pass
+
+        # Miss - remember the vector so the Claude response can be added to the index
+        self._pending_embeddings[cache_key] = (vector, guard)
+        return None
+
+    def _prefiltered_analysis(self, job: Dict, company: Dict = None) -> Optional[Dict]:
+        """
+        Cheap pre-filter for jobs the profile rules out regardless of content
+
+        Applies to excluded keywords in the title, or a non-UK location with
+        no UK/remote mention. Returns the rule-based analysis instead of a
+        Claude call, but only when it scores below matching.min_score, so a
+        prefiltered job is never saved as a match. None means ask Claude.
+        """
+        if not self.prefilter:
+            return None
+
+        title_lower = job['title'].lower()
+        title_and_location = title_lower + ' ' + (job.get('location') or '').lower()
+        ruled_out = (self._exclude_re.search(title_lower) or
+                     (_REJECT_RE.search(title_and_location) and not _UK_RE.search(title_and_location)))
+        if not ruled_out:
+            return None
+
+        analysis = self._rule_based_analyze(job, company)
+        return analysis if analysis['score'] < self.matching_config.get('min_score', 70) else None
+
     def _ai_analyze(self, job: Dict, company: Dict = None) -> Dict:
-        """Use Claude API to analyze job match"""
+        """Use Claude API to analyze job match (checks the response caches first)"""
+        analysis = self._prefiltered_analysis(job, company)
+        if analysis is not None:
+            return analysis
+
+        cache_key = self._cache_key(job, company)
+        cached = self._lookup_cache(cache_key, job, company)
+        if cached:
+            return cached
+
+        response_text = self._request_analysis(job, company)
+        return self._parse_response(response_text, cache_key, job, company)
+
+    def _request_analysis(self, job: Dict, company: Dict = None) -> Optional[str]:
+        """Call Claude for one job and return the raw response text (None on error)"""
         try:
             prompt = self._build_analysis_prompt(job, company)
 
+            response_text = self._stream_json(prompt)
+            if response_text is not None:
+                try:
+                    json.loads(response_text)
+                    return response_text
+                except json.JSONDecodeError:
+                    pass  # Fall through to the non-streaming request
+
             message = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=1000,
+                model=MODEL,
+                max_tokens=FALLBACK_MAX_TOKENS,
                 messages=[{"role": "user", "content": prompt}]
             )
 
-            response_text = message.content[0].text
-
-            # Parse JSON response
-            try:
-                analysis = json.loads(response_text)
-                return analysis
-            except json.JSONDecodeError:
-                # Fallback if response isn't valid JSON
-                return self._rule_based_analyze(job, company)
+            return message.content[0].text
 
         except Exception as e:
             print(f"Error analyzing job with AI: {str(e)}")
+            return None
+
+    def _stream_json(self, prompt: List[Dict]) -> Optional[str]:
+        """
+        Stream a response and stop reading once the top-level JSON object closes
+
+        Returns the JSON text, or None if the stream ended before an object
+        was completed (e.g. it hit max_tokens).
+        """
+        chars = []
+        depth = 0
+        in_string = False
+        escaped = False
+
+        with self.client.messages.stream(
+            model=MODEL,
+            max_tokens=RESPONSE_MAX_TOKENS,
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            for text in stream.text_stream:
+                for char in text:
+                    if depth == 0 and char != '{':
+                        continue  # Skip anything before the object starts
+                    chars.append(char)
+
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif char == '\\':
+                            escaped = True
+                        elif char == '"':
+                            in_string = False
+                    elif char == '"':
+                        in_string = True
+                    elif char == '{':
+                        depth += 1
+                    elif char == '}':
+                        depth -= 1
+                        if depth == 0:
+                            return ''.join(chars)  # Leaving the with block closes the stream
+
+        return None
+
+    def _parse_response(self, response_text: Optional[str], cache_key: str,
+                        job: Dict, company: Dict = None) -> Dict:
+        """Parse a Claude JSON response and cache it, falling back to rules on failure"""
+        try:
+            analysis = json.loads(response_text) if response_text else None
+        except json.JSONDecodeError:
+            analysis = None  # Response isn't valid JSON
+
+        if analysis is None:
+            self._pending_embeddings.pop(cache_key, None)  # Nothing to add to the semantic index
             return self._rule_based_analyze(job, company)
 
-    def _build_analysis_prompt(self, job: Dict, company: Dict = None) -> str:
-        """Build prompt for Claude to analyze job match"""
-        company_info = f"Company: {company['name']} ({company.get('industry', 'Unknown industry')})" if company else ""
+        self._save_cached_analysis(cache_key, response_text)
+        return analysis
 
-        return f"""Analyze this job posting for relevance to the candidate profile below.
+    def analyze_jobs(self, jobs: List[Tuple[Dict, Dict]],
+                     max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> List[Dict]:
+        """
+        Analyze many (job, company) pairs with concurrent Claude calls
 
-CANDIDATE PROFILE:
-{json.dumps(self.user_profile, indent=2)}
+        Only the API requests run on worker threads; cache lookups and writes
+        stay on the calling thread. Identical jobs (same cache key) share one
+        request. Returns analyses in the same order as the input.
+        """
+        if not self.enabled:
+            return [self._rule_based_analyze(job, company) for job, company in jobs]
+
+        results: List[Optional[Dict]] = [None] * len(jobs)
+        pending: Dict[str, List[int]] = {}  # cache_key -> indexes of jobs waiting on it
+
+        for i, (job, company) in enumerate(jobs):
+            results[i] = self._prefiltered_analysis(job, company)
+            if results[i] is not None:
+                continue
+            cache_key = self._cache_key(job, company)
+            if cache_key in pending:
+                pending[cache_key].append(i)
+                continue
+            results[i] = self._lookup_cache(cache_key, job, company)
+            if results[i] is None:
+                pending[cache_key] = [i]
+
+        to_request = list(pending.items())
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            responses = list(executor.map(lambda item: self._request_analysis(*jobs[item[1][0]]), to_request))
+
+        for (cache_key, indexes), response_text in zip(to_request, responses):
+            analysis = self._parse_response(response_text, cache_key, *jobs[indexes[0]])
+            for i in indexes:
+                results[i] = dict(analysis)
+
+        return results
+
+    def analyze_jobs_batch(self, jobs: List[Tuple[Dict, Dict]]) -> List[Dict]:
+        """
+        Analyze many (job, company) pairs via the Message Batches API
 
-JOB POSTING:
-{company_info}
-Title: {job['title']}
-Location: {job.get('location', 'Not specified')}
-Description:
-{job.get('description', 'No description available')[:2000]}
+        Batches cost 50% less and skip per-call round trips, but results can
+        take minutes to arrive - use for non-interactive sweeps only.
+        Returns analyses in the same order as the input.
+        """
+        if not self.enabled:
+            return [self._rule_based_analyze(job, company) for job, company in jobs]
+
+        results: List[Optional[Dict]] = [None] * len(jobs)
+        pending: Dict[str, Tuple[str, List[int]]] = {}  # custom_id -> (cache_key, indexes waiting on it)
+        custom_id_by_key: Dict[str, str] = {}  # Identical jobs share one batch request
+
+        for i, (job, company) in enumerate(jobs):
+            results[i] = self._prefiltered_analysis(job, company)
+            if results[i] is not None:
+                continue
+            cache_key = self._cache_key(job, company)
+            if cache_key in custom_id_by_key:
+                pending[custom_id_by_key[cache_key]][1].append(i)
+                continue
+            results[i] = self._lookup_cache(cache_key, job, company)
+            if results[i] is None:
+                custom_id_by_key[cache_key] = f"job-{i}"
+                pending[f"job-{i}"] = (cache_key, [i])
+
+        custom_ids = list(pending)
+        for start in range(0, len(custom_ids), BATCH_MAX_REQUESTS):
+            chunk = custom_ids[start:start + BATCH_MAX_REQUESTS]
+
+            try:
+                responses = self._run_batch({cid: jobs[pending[cid][1][0]] for cid in chunk})
+            except Exception as e:
+                print(f"Error running analysis batch: {str(e)}")
+                responses = {}
+
+            # Errored, expired or unparseable items fall back to rules
+            for custom_id in chunk:
+                cache_key, indexes = pending[custom_id]
+                analysis = self._parse_response(responses.get(custom_id), cache_key, *jobs[indexes[0]])
+                for i in indexes:
+                    results[i] = dict(analysis)
+
+        return results
+
+    def _run_batch(self, batch_jobs: Dict[str, Tuple[Dict, Dict]]) -> Dict[str, str]:
+        """Submit one message batch, wait for it to end, return custom_id -> response text"""
+        batch = self.client.messages.batches.create(requests=[
+            {
+                "custom_id": custom_id,
+                "params": {
+                    "model": MODEL,
+                    "max_tokens": RESPONSE_MAX_TOKENS,
+                    "messages": [{"role": "user", "content": self._build_analysis_prompt(job, company)}]
+                }
+            }
+            for custom_id, (job, company) in batch_jobs.items()
+        ])
+
+        # Poll with exponential backoff (30s -> 5min)
+        delay = BATCH_POLL_INITIAL_SECONDS
+        while batch.processing_status != "ended":
+            time.sleep(delay)
+            delay = min(delay * 2, BATCH_POLL_MAX_SECONDS)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        responses = {}
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                responses[entry.custom_id] = entry.result.message.content[0].text
+
+        failed = len(batch_jobs) - len(responses)
+        if failed:
+            print(f"Warning: {failed} batch requests errored or expired. Using rule-based matching for them.")
+
+        return responses
+
+    def _truncate_description(self, text: str, max_tokens: int = DESCRIPTION_TOKEN_BUDGET) -> str:
+        """Collapse scraped whitespace and cut text to roughly max_tokens tokens"""
+        text = _WHITESPACE_RE.sub(' ', text).strip()
+
+        if self._encoding:
+            tokens = self._encoding.encode(text)
+            return text if len(tokens) <= max_tokens else self._encoding.decode(tokens[:max_tokens])
+
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        return text[:max_chars].rsplit(' ', 1)[0]  # Don't cut mid-word
+
+    def _build_static_prompt(self) -> str:
+        """
+        Build the job-independent part of the analysis prompt
+
+        Kept above Anthropic's 1024-token minimum so prompt caching applies.
+        """
+        return f"""You analyze job postings for relevance to the candidate profile below.
+
+CANDIDATE PROFILE:
+{self._profile_json}
 
 SCORING CRITERIA:
 - Role alignment with target roles (PM in deep tech or VC in deep tech): 40 points
@@ -129,6 +544,59 @@ SCORING CRITERIA:
 - Location match (London, UK, Remote): 10 points
 - Company stage match: 5 points
 
+DETAILED RUBRIC:
+
+Role alignment (0-40):
+- 35-40: Product Manager, Technical Product Manager, Hardware Product Manager or Platform
+  Product Manager owning a deep tech product; VC Analyst, Associate or Investment
+  Associate at a fund that invests in deep tech.
+- 25-34: Technical Program Manager or Project Manager on hardware/silicon programs,
+  Product Owner roles, or generalist VC/investment roles with some deep tech exposure.
+- 10-24: Adjacent roles that could lead to PM/VC (solutions architect, technical
+  strategy, corporate venture, business development for hardware products).
+- 0-9: Pure engineering, sales, marketing, operations or other unrelated roles.
+- "Technical PM" scores higher than generic "PM". "Hardware PM" is rare but a perfect match.
+- Junior, entry-level and internship roles should score low regardless of domain.
+
+Industry relevance (0-25):
+- 20-25: Robotics, autonomous vehicles, AI chips/accelerators, semiconductors, SoC or
+  VLSI design, edge AI, computer vision hardware.
+- 10-19: Broader deep tech (quantum, photonics, climate hardware, AI infrastructure).
+- 0-9: Consumer apps, social, gaming, fintech, adtech or pure SaaS.
+- VC roles rarely mention "deep tech" explicitly - infer it from the fund's portfolio
+  and thesis when the company is a known investor.
+
+Technical depth (0-20):
+- 15-20: The role explicitly values hardware, silicon, VLSI, RISC-V or SoC background,
+  or requires an engineering degree / hands-on technical experience.
+- 8-14: Technical background is a plus but not required.
+- 0-7: No technical requirement, or the role is purely commercial.
+- Team leadership experience translates well to PM roles - credit it where relevant.
+
+Location (0-10):
+- 10: London, elsewhere in the UK (Cambridge, Oxford, Bristol, Manchester, Edinburgh),
+  or fully remote / hybrid from the UK.
+- 0: Roles based outside the UK (US, India, China, Taiwan, Singapore, etc.) - also
+  lower the overall score substantially since relocation is not an option.
+- If the location is not specified, give partial credit (5).
+
+Company stage (0-5):
+- 5: Series A or later startups, growth-stage scale-ups, public companies and
+  established VC funds.
+- 0-4: Pre-seed/seed companies or organisations of unknown stage.
+
+Pros and cons:
+- Pros should name concrete overlaps between the posting and the profile (e.g. "SoC
+  background directly relevant to the AI accelerator roadmap"), not generic praise.
+- Cons should flag real blockers first: wrong location, seniority mismatch, missing
+  domain experience the posting treats as mandatory, or a role that is PM in name only.
+- Keep each item under 15 words.
+
+Reasoning:
+- Summarise in 2-3 sentences why the score landed where it did, mentioning the
+  strongest match and the biggest concern.
+- Do not restate the job title or company name verbatim.
+
 Return ONLY a JSON object (no other text) with this exact structure:
 {{
   "score": <0-100>,
@@ -145,14 +613,36 @@ Recommendations:
 - "skip" if score < 60
 """
 
+    def _build_analysis_prompt(self, job: Dict, company: Dict = None) -> List[Dict]:
+        """Build message content for Claude: cached static prefix + per-job posting"""
+        company_info = f"Company: {company['name']} ({company.get('industry', 'Unknown industry')})" if company else ""
+
+        job_text = self._JOB_PROMPT_TEMPLATE.format_map({
+            'company_info': company_info,
+            'title': job['title'],
+            'location': job.get('location', 'Not specified'),
+            'description': self._truncate_description(job.get('description') or 'No description available'),
+        })
+
+        return [
+            {"type": "text", "text": self._static_prompt, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": job_text}
+        ]
+
     def _rule_based_analyze(self, job: Dict, company: Dict = None) -> Dict:
         """Rule-based analysis (fallback when AI is not available)"""
         title_lower = job['title'].lower()
-        description_lower = job.get('description', '').lower()
-        location_lower = job.get('location', '').lower()
-
-        # Also check title for location patterns (e.g., "US - City", "UK - City")
-        title_and_location = title_lower + ' ' + location_lower
+        description_lower = (job.get('description') or '').lower()
+        location = job.get('location') or ''  # Scraped jobs can carry None
+        location_lower = location.lower()
+
+        # One buffer for all scans: title and location joined by a space (so the title's
+        # own location patterns like "US - City" still count), then the description behind
+        # a sentinel no keyword contains. Regions are searched via pos/endpos, no slicing.
+        combined = title_lower + ' ' + location_lower + '\x1f' + description_lower
+        title_end = len(title_lower)
+        location_end = title_end + 1 + len(location_lower)
+        description_start = location_end + 1
 
         score = 0
         role_type = "other"
@@ -160,7 +650,7 @@ Recommendations:
         cons = []
 
         # Role type detection and scoring
-        if any(keyword in title_lower for keyword in ['product manager', 'product lead', 'project manager', 'program manager', 'pm ', 'tpm']):
+        if _PM_TITLE_RE.search(title_lower):
             role_type = "pm"
             score += 40
 
@@ -172,12 +662,12 @@ Recommendations:
                 pros.append("Program Manager role - matches target")
 
             # Technical PM/Project Manager bonus
-            if any(keyword in title_lower + description_lower for keyword in ['technical', 'hardware', 'platform', 'infrastructure', 'engineering']):
+            if _TECHNICAL_PM_RE.search(combined, 0, title_end) or \
+               _TECHNICAL_PM_RE.search(combined, description_start):
                 score += 10
                 pros.append("Technical/Hardware/Engineering PM focus")
 
-        elif any(keyword in title_lower for keyword in ['venture', 'vc']) or \
-             any(phrase in title_lower for phrase in ['investment analyst', 'investment associate', 'principal - investment', 'principal investor']):
+        elif _VC_TITLE_RE.search(title_lower):
             role_type = "vc"
             score += 40
             pros.append("VC role - matches target")
@@ -185,8 +675,9 @@ Recommendations:
             cons.append("Role type doesn't match PM or VC targets")
 
         # Industry relevance
-        industry_keywords = ['robotics', 'autonomous', 'ai hardware', 'chip', 'semiconductor', 'soc', 'vlsi', 'deep tech', 'hardware', 'edge ai']
-        matched_industries = [kw for kw in industry_keywords if kw in title_lower + description_lower]
+        found_industries = set(_INDUSTRY_RE.findall(combined, 0, title_end))
+        found_industries.update(_INDUSTRY_RE.findall(combined, description_start))
+        matched_industries = [kw for kw in _INDUSTRY_KEYWORDS if kw in found_industries]
 
         if matched_industries:
             score += min(25, len(matched_industries) * 8)
@@ -195,45 +686,37 @@ Recommendations:
             cons.append("Industry may not be deep tech focused")
 
         # Technical requirements
-        tech_keywords = ['vlsi', 'soc', 'risc-v', 'hardware', 'chip', 'technical background', 'engineering degree']
-        if any(kw in description_lower for kw in tech_keywords):
+        if _TECH_RE.search(combined, description_start):
             score += 15
             pros.append("Values technical/hardware background")
 
         # Location match - STRICT: London, UK, and nearby UK cities ONLY
-        uk_locations = ['london', 'cambridge', 'bristol', 'oxford', 'manchester', 'edinburgh',
-                       'glasgow', 'birmingham', 'uk', 'united kingdom', 'remote', 'hybrid']
-
         # Check if location is in UK/acceptable (check both title and location field)
-        is_uk_location = any(loc in title_and_location for loc in uk_locations)
+        is_uk_location = _UK_RE.search(combined, 0, location_end) is not None
 
         # Check for REJECTED locations (non-UK) - check title and location
-        rejected_locations = ['austin', 'texas', 'us ', 'usa', 'united states', 'california', 'new york',
-                            'bengaluru', 'bangalore', 'india', 'china', 'singapore', 'taiwan', 'hsinchu',
-                            'milpitas', 'san francisco', 'seattle']
-        is_rejected = any(loc in title_and_location for loc in rejected_locations)
+        is_rejected = _REJECT_RE.search(combined, 0, location_end) is not None
 
         if is_rejected:
             # Heavy penalty for non-UK locations
             score = max(0, score - 50)
-            cons.append(f"Location NOT in London/UK: {job.get('location', '')}")
+            cons.append(f"Location NOT in London/UK: {location}")
         elif is_uk_location:
             score += 10
-            pros.append(f"Good location: {job.get('location', '')}")
+            pros.append(f"Good location: {location}")
         else:
             if location_lower and location_lower != 'not specified':
-                cons.append(f"Location unclear: {job.get('location', '')}")
+                cons.append(f"Location unclear: {location}")
 
         # Company info bonus
         if company:
             company_industry = company.get('industry', '').lower()
-            if any(kw in company_industry for kw in ['robotics', 'ai', 'semiconductor', 'deep tech']):
+            if _COMPANY_INDUSTRY_RE.search(company_industry):
                 score += 5
                 pros.append(f"Strong company: {company.get('name')}")
 
         # Negative signals
-        exclude_keywords = self.criteria.get('keywords_exclude', [])
-        if any(kw.lower() in title_lower for kw in exclude_keywords):
+        if self._exclude_re.search(title_lower):
             score = max(0, score - 30)
             cons.append("Contains excluded keywords")
 
@@ -5,11 +5,58 @@ Handles SQLite database operations for storing jobs and companies
 
 import sqlite3
 import json
-from datetime import datetime
+import threading
+from functools import wraps
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional
 
 
+URL_LOOKUP_CHUNK_SIZE = 500  # Bound parameters per IN (...) query
+
+# Shared SQL so sqlite3's statement cache can reuse the compiled plans
+# Local ISO-8601 timestamp computed by SQLite, so inserts don't format one in Python
+_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+_JOB_SELECT = """
+    SELECT j.*, c.name as company_name, c.url as company_url, c.industry
+    FROM jobs j
+    JOIN companies c ON j.company_id = c.id
+"""
+
+# Same rows without the (large) description, for listings and exports that don't show it
+_JOB_SUMMARY_SELECT = """
+    SELECT j.id, j.company_id, j.title, j.url, j.location, j.role_type, j.relevance_score,
+           j.ai_analysis, j.status, j.discovered_date, j.applied_date, j.notes,
+           c.name as company_name, c.url as company_url, c.industry
+    FROM jobs j
+    JOIN companies c ON j.company_id = c.id
+"""
+
+_JOB_INSERT_COLUMNS = """jobs (company_id, title, url, description, location, role_type,
+                 relevance_score, ai_analysis, discovered_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, """ + _NOW + """)
+"""
+_INSERT_JOB = "INSERT INTO " + _JOB_INSERT_COLUMNS
+_INSERT_JOB_OR_IGNORE = "INSERT OR IGNORE INTO " + _JOB_INSERT_COLUMNS
+
+_COMPANY_INSERT_COLUMNS = """companies (name, url, career_page_url, industry, location,
+                      company_type, funding_stage, discovered_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, """ + _NOW + """)
+"""
+_INSERT_COMPANY = "INSERT INTO " + _COMPANY_INSERT_COLUMNS
+_INSERT_COMPANY_OR_IGNORE = "INSERT OR IGNORE INTO " + _COMPANY_INSERT_COLUMNS
+
+
+def _locked(method):
+    """Serialize a JobDatabase method on the connection lock"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class JobDatabase:
     """Manages job and company data in SQLite database"""
 
@@ -17,8 +64,18 @@ class JobDatabase:
         """Initialize database connection and create tables if needed"""
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(self.db_path)
+        # Shared with worker threads; every method that touches it holds self._lock
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.RLock()
         self.conn.row_factory = sqlite3.Row  # Enable column access by name
+
+        # WAL + relaxed fsync: commits no longer block readers or fsync the main file
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+
         self.create_tables()
 
     def create_tables(self):
@@ -72,8 +129,109 @@ class JobDatabase:
             )
         """)
 
+        # Indexes for get_jobs ordering/filtering and the companies JOIN
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_score_status
+            ON jobs (relevance_score DESC, status, discovered_date DESC)
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_company_id ON jobs (company_id)")
+
+        # AI analysis response cache (keyed by SHA-256 of model/prompt/profile/job)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ai_analysis_cache (
+                hash TEXT PRIMARY KEY,
+                model TEXT,
+                prompt_version TEXT,
+                response TEXT,  -- Raw JSON response from Claude
+                created_at TEXT,
+                expires_at TEXT
+            )
+        """)
+
+        # Semantic cache: embeddings of analyzed jobs, bucketed by a lexical guard
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ai_semantic_cache (
+                hash TEXT PRIMARY KEY,
+                guard TEXT,  -- JSON [role_type, location, company, excluded keywords]
+                embedding BLOB,  -- Normalized float32 vector
+                response TEXT,
+                created_at TEXT,
+                expires_at TEXT
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_semantic_cache_guard ON ai_semantic_cache (guard)")
+
+        # Company discovery search results (keyed by SHA-256 of query/type/criteria)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS discovery_cache (
+                hash TEXT PRIMARY KEY,
+                response TEXT,  -- JSON list of companies
+                created_at TEXT,
+                expires_at TEXT
+            )
+        """)
+
+        # Career page validators for conditional re-scrapes (If-None-Match / If-Modified-Since)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS page_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                jobs TEXT,  -- JSON list of jobs extracted from the page
+                scraped_at TEXT
+            )
+        """)
+
+        self._create_search_index(cursor)
+
         self.conn.commit()
 
+    def _create_search_index(self, cursor):
+        """Create the FTS5 keyword index over job titles/descriptions, kept in sync by triggers"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'")
+        exists = cursor.fetchone() is not None
+
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+                    title, description,
+                    content='jobs', content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            """)
+        except sqlite3.OperationalError:
+            print("Warning: SQLite was built without FTS5, keyword search falls back to slower LIKE scans")
+            self.has_fts = False
+            return
+
+        self.has_fts = True
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+                INSERT INTO jobs_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+                INSERT INTO jobs_fts (jobs_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE OF title, description ON jobs BEGIN
+                INSERT INTO jobs_fts (jobs_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO jobs_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        """)
+
+        if not exists:
+            # Index jobs stored before the search table existed
+            cursor.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+    @_locked
     def add_company(self, name: str, url: str = None, career_page_url: str = None,
                     industry: str = None, location: str = None, company_type: str = None,
                     funding_stage: str = None) -> int:
@@ -81,12 +239,8 @@ class JobDatabase:
         cursor = self.conn.cursor()
 
         try:
-            cursor.execute("""
-                INSERT INTO companies (name, url, career_page_url, industry, location,
-                                     company_type, funding_stage, discovered_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (name, url, career_page_url, industry, location, company_type,
-                  funding_stage, datetime.now().isoformat()))
+            cursor.execute(_INSERT_COMPANY, (name, url, career_page_url, industry, location,
+                                             company_type, funding_stage))
 
             self.conn.commit()
             return cursor.lastrowid
@@ -97,6 +251,34 @@ class JobDatabase:
             result = cursor.fetchone()
             return result[0] if result else None
 
+    @_locked
+    def add_companies_bulk(self, companies: List[Dict]) -> List[Optional[int]]:
+        """
+        Add many companies in a single transaction, return their IDs in order
+
+        Each dict takes the same keys as add_company(). Companies that
+        already exist keep their row and return its ID.
+        """
+        ids = []
+
+        with self.conn:
+            cursor = self.conn.cursor()
+            for company in companies:
+                cursor.execute(_INSERT_COMPANY_OR_IGNORE, (
+                    company['name'], company.get('url'), company.get('career_page_url'),
+                    company.get('industry'), company.get('location'), company.get('company_type'),
+                    company.get('funding_stage')
+                ))
+                if cursor.rowcount:
+                    ids.append(cursor.lastrowid)
+                else:
+                    cursor.execute("SELECT id FROM companies WHERE name = ?", (company['name'],))
+                    result = cursor.fetchone()
+                    ids.append(result[0] if result else None)
+
+        return ids
+
+    @_locked
     def add_job(self, company_id: int, title: str, url: str, description: str = None,
                 location: str = None, role_type: str = None, relevance_score: int = 0,
                 ai_analysis: Dict = None) -> Optional[int]:
@@ -104,13 +286,8 @@ class JobDatabase:
         cursor = self.conn.cursor()
 
         try:
-            cursor.execute("""
-                INSERT INTO jobs (company_id, title, url, description, location, role_type,
-                                relevance_score, ai_analysis, discovered_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (company_id, title, url, description, location, role_type,
-                  relevance_score, json.dumps(ai_analysis) if ai_analysis else None,
-                  datetime.now().isoformat()))
+            cursor.execute(_INSERT_JOB, (company_id, title, url, description, location, role_type,
+                                         relevance_score, json.dumps(ai_analysis) if ai_analysis else None))
 
             self.conn.commit()
             return cursor.lastrowid
@@ -119,17 +296,35 @@ class JobDatabase:
             # Job URL already exists, skip
             return None
 
-    def get_jobs(self, status: str = None, min_score: int = 0,
-                 role_type: str = None, limit: int = 100) -> List[Dict]:
-        """Get jobs from database with optional filters"""
-        cursor = self.conn.cursor()
+    @_locked
+    def add_jobs_bulk(self, jobs: List[Dict]) -> List[Optional[int]]:
+        """
+        Add many jobs in a single transaction, return their new IDs in order
 
-        query = """
-            SELECT j.*, c.name as company_name, c.url as company_url, c.industry
-            FROM jobs j
-            JOIN companies c ON j.company_id = c.id
-            WHERE j.relevance_score >= ?
+        Each dict takes the same keys as add_job(). Jobs whose URL already
+        exists are skipped and get None, as with add_job().
         """
+        rows = [
+            (job['company_id'], job['title'], job['url'], job.get('description'),
+             job.get('location'), job.get('role_type'), job.get('relevance_score', 0),
+             json.dumps(job['ai_analysis']) if job.get('ai_analysis') else None)
+            for job in jobs
+        ]
+
+        ids = []
+
+        with self.conn:
+            cursor = self.conn.cursor()
+            for row in rows:
+                cursor.execute(_INSERT_JOB_OR_IGNORE, row)
+                ids.append(cursor.lastrowid if cursor.rowcount else None)
+
+        return ids
+
+    def get_jobs(self, status: str = None, min_score: int = 0, role_type: str = None,
+                 limit: int = 100, include_description: bool = True) -> List[Dict]:
+        """Get jobs from database with optional filters"""
+        query = (_JOB_SELECT if include_description else _JOB_SUMMARY_SELECT) + " WHERE j.relevance_score >= ?"
         params = [min_score]
 
         if status:
@@ -143,24 +338,76 @@ class JobDatabase:
         query += " ORDER BY j.relevance_score DESC, j.discovered_date DESC LIMIT ?"
         params.append(limit)
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        return self._fetch_dicts(query, params)
 
-        return [dict(row) for row in rows]
+    def search_jobs(self, query: str, limit: int = 50) -> List[Dict]:
+        """
+        Keyword search over job titles and descriptions, best matches (BM25) first
 
+        The query is a list of words, not FTS syntax: "RISC-V", "C++" and
+        stray quotes are matched literally, and every word must match.
+        Without FTS5 (or if the index rejects the query), falls back to
+        substring matching ordered by relevance score.
+        """
+        words = query.split()
+        if not words:
+            return []
+
+        if self.has_fts:
+            fts_query = ' '.join('"' + word.replace('"', '""') + '"' for word in words)
+            try:
+                return self._fetch_dicts("""
+                    SELECT j.*, c.name as company_name, c.url as company_url, c.industry
+                    FROM jobs_fts
+                    JOIN jobs j ON j.id = jobs_fts.rowid
+                    JOIN companies c ON j.company_id = c.id
+                    WHERE jobs_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                """, (fts_query, limit))
+            except sqlite3.OperationalError:
+                pass
+
+        return self._search_jobs_like(words, limit)
+
+    def _search_jobs_like(self, words: List[str], limit: int) -> List[Dict]:
+        """Jobs whose title or description contains every word (case-insensitive LIKE scan)"""
+        conditions = " AND ".join(
+            "(j.title LIKE ? ESCAPE '\\' OR j.description LIKE ? ESCAPE '\\')" for _ in words
+        )
+        params = []
+        for word in words:
+            pattern = '%' + word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            params += [pattern, pattern]
+        return self._fetch_dicts(_JOB_SELECT + f" WHERE {conditions} ORDER BY j.relevance_score DESC LIMIT ?",
+                                 (*params, limit))
+
+    @_locked
+    def get_existing_job_urls(self, urls: List[str]) -> set:
+        """Return which of the given job URLs are already stored"""
+        urls = [url for url in set(urls) if url]
+        existing = set()
+
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(urls), URL_LOOKUP_CHUNK_SIZE):
+            chunk = urls[start:start + URL_LOOKUP_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            existing.update(row[0] for row in self.conn.execute(
+                f"SELECT url FROM jobs WHERE url IN ({placeholders})", chunk
+            ))
+
+        return existing
+
+    @_locked
     def get_job_by_id(self, job_id: int) -> Optional[Dict]:
         """Get a single job by ID"""
         cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT j.*, c.name as company_name, c.url as company_url, c.industry
-            FROM jobs j
-            JOIN companies c ON j.company_id = c.id
-            WHERE j.id = ?
-        """, (job_id,))
+        cursor.execute(_JOB_SELECT + " WHERE j.id = ?", (job_id,))
 
         row = cursor.fetchone()
         return dict(row) if row else None
 
+    @_locked
     def update_job_status(self, job_id: int, status: str, notes: str = None):
         """Update job application status"""
         cursor = self.conn.cursor()
@@ -168,9 +415,9 @@ class JobDatabase:
         if status == 'applied':
             cursor.execute("""
                 UPDATE jobs
-                SET status = ?, applied_date = ?, notes = COALESCE(?, notes)
+                SET status = ?, applied_date = """ + _NOW + """, notes = COALESCE(?, notes)
                 WHERE id = ?
-            """, (status, datetime.now().isoformat(), notes, job_id))
+            """, (status, notes, job_id))
         else:
             cursor.execute("""
                 UPDATE jobs
@@ -182,48 +429,150 @@ class JobDatabase:
 
     def get_companies(self, company_type: str = None) -> List[Dict]:
         """Get all companies from database"""
-        cursor = self.conn.cursor()
-
         if company_type:
-            cursor.execute("""
+            return self._fetch_dicts("""
                 SELECT * FROM companies
                 WHERE company_type = ?
                 ORDER BY discovered_date DESC
             """, (company_type,))
-        else:
-            cursor.execute("SELECT * FROM companies ORDER BY discovered_date DESC")
 
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        return self._fetch_dicts("SELECT * FROM companies ORDER BY discovered_date DESC")
 
+    @_locked
     def update_company_last_scraped(self, company_id: int):
         """Update the last scraped timestamp for a company"""
         cursor = self.conn.cursor()
         cursor.execute("""
             UPDATE companies
-            SET last_scraped = ?
+            SET last_scraped = """ + _NOW + """
             WHERE id = ?
-        """, (datetime.now().isoformat(), company_id))
+        """, (company_id,))
         self.conn.commit()
 
-    def get_stats(self) -> Dict:
-        """Get database statistics"""
+    @_locked
+    def update_companies_last_scraped(self, company_ids: List[int]):
+        """Update the last scraped timestamp for many companies in one transaction"""
+        with self.conn:
+            self.conn.executemany("""
+                UPDATE companies
+                SET last_scraped = """ + _NOW + """
+                WHERE id = ?
+            """, [(company_id,) for company_id in company_ids])
+
+    @_locked
+    def get_cached_analysis(self, cache_hash: str) -> Optional[str]:
+        """Get a cached AI analysis response, or None if missing/expired"""
         cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT response FROM ai_analysis_cache
+            WHERE hash = ? AND expires_at > ?
+        """, (cache_hash, datetime.now().isoformat()))
 
-        cursor.execute("SELECT COUNT(*) FROM companies")
-        total_companies = cursor.fetchone()[0]
+        row = cursor.fetchone()
+        return row[0] if row else None
 
-        cursor.execute("SELECT COUNT(*) FROM jobs")
-        total_jobs = cursor.fetchone()[0]
+    @_locked
+    def save_cached_analysis(self, cache_hash: str, model: str, prompt_version: str,
+                             response: str, ttl_seconds: int):
+        """Store an AI analysis response in the cache"""
+        now = datetime.now()
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO ai_analysis_cache
+                (hash, model, prompt_version, response, created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (cache_hash, model, prompt_version, response, now.isoformat(),
+              (now + timedelta(seconds=ttl_seconds)).isoformat()))
+        self.conn.commit()
 
-        cursor.execute("SELECT COUNT(*) FROM jobs WHERE status = 'new'")
-        new_jobs = cursor.fetchone()[0]
+    @_locked
+    def get_semantic_cache_entries(self, guard: str) -> List[tuple]:
+        """Get live (embedding, response) pairs in a semantic cache bucket"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT embedding, response FROM ai_semantic_cache
+            WHERE guard = ? AND expires_at > ?
+        """, (guard, datetime.now().isoformat()))
+        return cursor.fetchall()
+
+    @_locked
+    def save_semantic_cache_entry(self, cache_hash: str, guard: str, embedding: bytes,
+                                  response: str, ttl_seconds: int):
+        """Store a job embedding and its AI analysis response"""
+        now = datetime.now()
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO ai_semantic_cache
+                (hash, guard, embedding, response, created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (cache_hash, guard, embedding, response, now.isoformat(),
+              (now + timedelta(seconds=ttl_seconds)).isoformat()))
+        self.conn.commit()
 
-        cursor.execute("SELECT COUNT(*) FROM jobs WHERE status = 'applied'")
-        applied_jobs = cursor.fetchone()[0]
+    @_locked
+    def get_cached_search(self, cache_hash: str) -> Optional[str]:
+        """Get cached discovery search results, or None if missing/expired"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT response FROM discovery_cache
+            WHERE hash = ? AND expires_at > ?
+        """, (cache_hash, datetime.now().isoformat()))
 
-        cursor.execute("SELECT AVG(relevance_score) FROM jobs")
-        avg_score = cursor.fetchone()[0] or 0
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    @_locked
+    def save_cached_search(self, cache_hash: str, response: str, ttl_seconds: int):
+        """Store discovery search results in the cache"""
+        now = datetime.now()
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO discovery_cache (hash, response, created_at, expires_at)
+            VALUES (?, ?, ?, ?)
+        """, (cache_hash, response, now.isoformat(),
+              (now + timedelta(seconds=ttl_seconds)).isoformat()))
+        self.conn.commit()
+
+    @_locked
+    def get_cached_page(self, url: str, max_age_seconds: int) -> Optional[Dict]:
+        """Get the stored validators and extracted jobs for a career page, or None if missing/too old"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT etag, last_modified, jobs FROM page_cache
+            WHERE url = ? AND scraped_at > ?
+        """, (url, (datetime.now() - timedelta(seconds=max_age_seconds)).isoformat()))
+
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    @_locked
+    def save_cached_page(self, url: str, etag: Optional[str], last_modified: Optional[str], jobs: str):
+        """Store a career page's validators and extracted jobs (JSON)"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO page_cache (url, etag, last_modified, jobs, scraped_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (url, etag, last_modified, jobs, datetime.now().isoformat()))
+        self.conn.commit()
+
+    @_locked
+    def get_stats(self) -> Dict:
+        """Get database statistics"""
+        cursor = self.conn.cursor()
+
+        # One scan of jobs for all counters (SUM is NULL on an empty table)
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM companies),
+                   COUNT(*),
+                   SUM(status = 'new'),
+                   SUM(status = 'applied'),
+                   AVG(relevance_score)
+            FROM jobs
+        """)
+        total_companies, total_jobs, new_jobs, applied_jobs, avg_score = cursor.fetchone()
+        new_jobs = new_jobs or 0
+        applied_jobs = applied_jobs or 0
+        avg_score = avg_score or 0
 
         return {
             "total_companies": total_companies,
@@ -233,6 +582,22 @@ class JobDatabase:
             "avg_relevance_score": round(avg_score, 1)
         }
 
+    @_locked
+    def _fetch_dicts(self, query: str, params=()) -> List[Dict]:
+        """
+        Run a query and return rows as dicts
+
+        Zipping plain tuples with the column names is ~2x faster than
+        dict(sqlite3.Row) on large listings.
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = None  # Plain tuples for this cursor only
+        cursor.execute(query, params)
+
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    @_locked
     def close(self):
         """Close database connection"""
         self.conn.close()
@@ -3,32 +3,337 @@ Company Discovery Module
 Uses web search to find relevant companies and VC firms
 """
 
+import hashlib
+import json
+import re
 import requests
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import quote_plus
 
 
+SEARCH_MAX_CONCURRENCY = 8
+HTTP_TIMEOUT_SECONDS = 10
+SEARCH_CACHE_TTL_SECONDS = 86400  # 24 hours
+
+# Career page paths to probe, most common first
+_CAREER_PATHS = ('/careers', '/jobs', '/join-us', '/team', '/work-with-us', '/opportunities')
+
+
+# Legal/fund suffixes ignored when comparing company names
+_COMPANY_SUFFIX_RE = re.compile(r'(\s+(ltd|limited|inc|llc|gmbh)\.?)+$', re.IGNORECASE)
+
+
+def _company_key(name: str) -> str:
+    """Normalize a company name for deduplication ("Atomico Ltd " == "atomico")"""
+    return _COMPANY_SUFFIX_RE.sub('', name.strip()).casefold()
+
+
+# Example VC firms in London/UK (to be replaced with real search)
+_EXAMPLE_VC_FIRMS: Tuple[Dict, ...] = (
+    {
+        'name': 'Atomico',
+        'url': 'https://atomico.com',
+        'career_page_url': 'https://atomico.com/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Deep Tech VC',
+        'location': 'London',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Balderton Capital',
+        'url': 'https://www.balderton.com',
+        'career_page_url': 'https://www.balderton.com/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Technology VC',
+        'location': 'London',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Index Ventures',
+        'url': 'https://www.indexventures.com',
+        'career_page_url': 'https://www.indexventures.com/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Technology VC',
+        'location': 'London',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Accel',
+        'url': 'https://www.accel.com',
+        'career_page_url': 'https://www.accel.com/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Technology VC',
+        'location': 'London',
+        'source': 'discovery'
+    },
+    {
+        'name': 'IQ Capital',
+        'url': 'https://iqcapital.vc',
+        'career_page_url': 'https://iqcapital.vc/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Deep Tech VC',
+        'location': 'London',
+        'source': 'discovery'
+    },
+    {
+        'name': 'LocalGlobe',
+        'url': 'https://localglobe.vc',
+        'career_page_url': 'https://localglobe.vc/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Deep Tech VC',
+        'location': 'London',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Octopus Ventures',
+        'url': 'https://octopusventures.com',
+        'career_page_url': 'https://octopusventures.com/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Deep Tech VC',
+        'location': 'London',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Episode 1',
+        'url': 'https://episode1.com',
+        'career_page_url': 'https://episode1.com/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Deep Tech VC',
+        'location': 'London',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Amadeus Capital Partners',
+        'url': 'https://www.amadeuscapital.com',
+        'career_page_url': 'https://www.amadeuscapital.com/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Deep Tech VC',
+        'location': 'Cambridge',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Cambridge Innovation Capital',
+        'url': 'https://www.cicplc.co.uk',
+        'career_page_url': 'https://www.cicplc.co.uk/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Deep Tech VC',
+        'location': 'Cambridge',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Notion Capital',
+        'url': 'https://www.notion.vc',
+        'career_page_url': 'https://www.notion.vc/careers',
+        'company_type': 'vc_firm',
+        'industry': 'Technology VC',
+        'location': 'London',
+        'source': 'discovery'
+    }
+)
+
+# Example deep tech companies (to be replaced with real search)
+_EXAMPLE_COMPANIES: Tuple[Dict, ...] = (
+    # Autonomous Vehicles / Robotics
+    {
+        'name': 'Wayve',
+        'url': 'https://wayve.ai',
+        'career_page_url': 'https://wayve.ai/careers',
+        'company_type': 'company',
+        'industry': 'Autonomous Vehicles',
+        'location': 'London',
+        'funding_stage': 'Series C',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Oxbotica',
+        'url': 'https://www.oxbotica.com',
+        'career_page_url': 'https://www.oxbotica.com/careers',
+        'company_type': 'company',
+        'industry': 'Autonomous Vehicles',
+        'location': 'Oxford, UK',
+        'funding_stage': 'Series C',
+        'source': 'discovery'
+    },
+    {
+        'name': 'FiveAI',
+        'url': 'https://five.ai',
+        'career_page_url': 'https://five.ai/careers',
+        'company_type': 'company',
+        'industry': 'Autonomous Vehicles',
+        'location': 'London',
+        'funding_stage': 'Series B',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Arrival',
+        'url': 'https://arrival.com',
+        'career_page_url': 'https://arrival.com/careers',
+        'company_type': 'company',
+        'industry': 'Electric Vehicles',
+        'location': 'London',
+        'funding_stage': 'Public',
+        'source': 'discovery'
+    },
+    # AI Hardware / Semiconductors
+    {
+        'name': 'Graphcore',
+        'url': 'https://www.graphcore.ai',
+        'career_page_url': 'https://www.graphcore.ai/jobs',
+        'company_type': 'company',
+        'industry': 'AI Hardware',
+        'location': 'Bristol, UK',
+        'funding_stage': 'Series E',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Arm',
+        'url': 'https://www.arm.com',
+        'career_page_url': 'https://careers.arm.com',
+        'company_type': 'company',
+        'industry': 'Semiconductors',
+        'location': 'Cambridge, UK',
+        'funding_stage': 'Public',
+        'source': 'discovery'
+    },
+    {
+        'name': 'PragmatIC Semiconductor',
+        'url': 'https://www.pragmaticsemi.com',
+        'career_page_url': 'https://www.pragmaticsemi.com/careers',
+        'company_type': 'company',
+        'industry': 'Semiconductors',
+        'location': 'Cambridge, UK',
+        'funding_stage': 'Series D',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Sondrel',
+        'url': 'https://www.sondrel.com',
+        'career_page_url': 'https://www.sondrel.com/careers',
+        'company_type': 'company',
+        'industry': 'Semiconductors',
+        'location': 'London',
+        'funding_stage': 'Established',
+        'source': 'discovery'
+    },
+    # AI / Deep Learning Scale-ups
+    {
+        'name': 'DeepMind',
+        'url': 'https://www.deepmind.com',
+        'career_page_url': 'https://www.deepmind.com/careers',
+        'company_type': 'company',
+        'industry': 'AI Research',
+        'location': 'London',
+        'funding_stage': 'Google',
+        'source': 'discovery'
+    },
+    {
+        'name': 'BenevolentAI',
+        'url': 'https://www.benevolent.com',
+        'career_page_url': 'https://www.benevolent.com/careers',
+        'company_type': 'company',
+        'industry': 'AI Drug Discovery',
+        'location': 'London',
+        'funding_stage': 'Public',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Faculty',
+        'url': 'https://faculty.ai',
+        'career_page_url': 'https://faculty.ai/careers',
+        'company_type': 'company',
+        'industry': 'AI Consultancy',
+        'location': 'London',
+        'funding_stage': 'Series B',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Synthesia',
+        'url': 'https://www.synthesia.io',
+        'career_page_url': 'https://www.synthesia.io/careers',
+        'company_type': 'company',
+        'industry': 'AI Video',
+        'location': 'London',
+        'funding_stage': 'Series C',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Tractable',
+        'url': 'https://tractable.ai',
+        'career_page_url': 'https://tractable.ai/careers',
+        'company_type': 'company',
+        'industry': 'AI for Insurance',
+        'location': 'London',
+        'funding_stage': 'Series E',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Darktrace',
+        'url': 'https://www.darktrace.com',
+        'career_page_url': 'https://www.darktrace.com/careers',
+        'company_type': 'company',
+        'industry': 'AI Cybersecurity',
+        'location': 'Cambridge, UK',
+        'funding_stage': 'Public',
+        'source': 'discovery'
+    },
+    {
+        'name': 'Improbable',
+        'url': 'https://www.improbable.io',
+        'career_page_url': 'https://www.improbable.io/careers',
+        'company_type': 'company',
+        'industry': 'Metaverse/Simulation',
+        'location': 'London',
+        'funding_stage': 'Series B',
+        'source': 'discovery'
+    }
+)
+
+
 class CompanyDiscovery:
     """Discovers companies and VC firms based on search criteria"""
 
-    def __init__(self, config: Dict):
-        """Initialize with configuration"""
+    def __init__(self, config: Dict, db=None):
+        """Initialize with configuration (db is an optional JobDatabase used as search cache)"""
         self.config = config
+        self.db = db
         self.criteria = config.get('criteria', {})
         self.search_queries = config.get('search_queries', {})
+        self.cache_ttl = config.get('discovery', {}).get('cache_ttl_seconds', SEARCH_CACHE_TTL_SECONDS)
+
+        # Criteria feed into every search, so changing them invalidates cached results
+        self._cache_key_base = hashlib.sha256(json.dumps(self.criteria, sort_keys=True).encode('utf-8'))
+        self._career_pages = {}  # company URL -> career page found by find_career_page
+
+        # One pooled keep-alive session for all outbound HTTP (sized for the search fan-out)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        """Close pooled HTTP connections"""
+        self.session.close()
 
     def discover_companies(self) -> List[Dict]:
         """
         Discover companies based on search queries
         Returns list of companies with name, url, type
         """
-        companies = []
+        # Deduplicate by normalized name as results arrive (first occurrence wins)
+        unique_companies = {}
 
         # Get custom companies from config
         custom_companies = self.config.get('custom_companies', [])
         if custom_companies:
             for company in custom_companies:
-                companies.append({
+                unique_companies.setdefault(_company_key(company['name']), {
                     'name': company['name'],
                     'url': company.get('url', ''),
                     'career_page_url': company.get('url', ''),  # Assume URL is career page
@@ -36,27 +341,34 @@ class CompanyDiscovery:
                     'source': 'config'
                 })
 
-        # Discover VC firms
-        vc_queries = self.search_queries.get('vc_firms', [])
-        for query in vc_queries:
-            results = self._search_web(query, company_type='vc_firm')
-            companies.extend(results)
+        # Discover VC firms and companies - all searches run concurrently
+        # (each is a network round trip), results kept in query order
+        searches = [(query, 'vc_firm') for query in self.search_queries.get('vc_firms', [])]
+        searches += [(query, 'company') for query in self.search_queries.get('companies', [])]
+
+        with ThreadPoolExecutor(max_workers=SEARCH_MAX_CONCURRENCY) as executor:
+            for results in executor.map(lambda search: self._cached_search(*search), searches):
+                for company in results:
+                    unique_companies.setdefault(_company_key(company['name']), company)
 
-        # Discover companies
-        company_queries = self.search_queries.get('companies', [])
-        for query in company_queries:
-            results = self._search_web(query, company_type='company')
-            companies.extend(results)
+        return list(unique_companies.values())
 
-        # Deduplicate by name
-        seen = set()
-        unique_companies = []
-        for company in companies:
-            if company['name'] not in seen:
-                seen.add(company['name'])
-                unique_companies.append(company)
+    def _cached_search(self, query: str, company_type: str = 'company') -> List[Dict]:
+        """Run _search_web, reusing results cached within the TTL when a database is available"""
+        if not self.db:
+            return self._search_web(query, company_type)
 
-        return unique_companies
+        key = self._cache_key_base.copy()
+        key.update(json.dumps([query, company_type]).encode('utf-8'))
+        cache_key = key.hexdigest()
+
+        cached = self.db.get_cached_search(cache_key)
+        if cached is not None:
+            return json.loads(cached)
+
+        results = self._search_web(query, company_type)
+        self.db.save_cached_search(cache_key, json.dumps(results), self.cache_ttl)
+        return results
 
     def _search_web(self, query: str, company_type: str = 'company') -> List[Dict]:
         """
@@ -79,279 +391,38 @@ class CompanyDiscovery:
 
     def _get_example_vc_firms(self) -> List[Dict]:
         """Return example VC firms in London/UK (to be replaced with real search)"""
-        return [
-            {
-                'name': 'Atomico',
-                'url': 'https://atomico.com',
-                'career_page_url': 'https://atomico.com/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Deep Tech VC',
-                'location': 'London',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Balderton Capital',
-                'url': 'https://www.balderton.com',
-                'career_page_url': 'https://www.balderton.com/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Technology VC',
-                'location': 'London',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Index Ventures',
-                'url': 'https://www.indexventures.com',
-                'career_page_url': 'https://www.indexventures.com/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Technology VC',
-                'location': 'London',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Accel',
-                'url': 'https://www.accel.com',
-                'career_page_url': 'https://www.accel.com/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Technology VC',
-                'location': 'London',
-                'source': 'discovery'
-            },
-            {
-                'name': 'IQ Capital',
-                'url': 'https://iqcapital.vc',
-                'career_page_url': 'https://iqcapital.vc/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Deep Tech VC',
-                'location': 'London',
-                'source': 'discovery'
-            },
-            {
-                'name': 'LocalGlobe',
-                'url': 'https://localglobe.vc',
-                'career_page_url': 'https://localglobe.vc/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Deep Tech VC',
-                'location': 'London',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Octopus Ventures',
-                'url': 'https://octopusventures.com',
-                'career_page_url': 'https://octopusventures.com/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Deep Tech VC',
-                'location': 'London',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Episode 1',
-                'url': 'https://episode1.com',
-                'career_page_url': 'https://episode1.com/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Deep Tech VC',
-                'location': 'London',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Amadeus Capital Partners',
-                'url': 'https://www.amadeuscapital.com',
-                'career_page_url': 'https://www.amadeuscapital.com/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Deep Tech VC',
-                'location': 'Cambridge',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Cambridge Innovation Capital',
-                'url': 'https://www.cicplc.co.uk',
-                'career_page_url': 'https://www.cicplc.co.uk/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Deep Tech VC',
-                'location': 'Cambridge',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Notion Capital',
-                'url': 'https://www.notion.vc',
-                'career_page_url': 'https://www.notion.vc/careers',
-                'company_type': 'vc_firm',
-                'industry': 'Technology VC',
-                'location': 'London',
-                'source': 'discovery'
-            }
-        ]
+        return list(_EXAMPLE_VC_FIRMS)
 
     def _get_example_companies(self) -> List[Dict]:
         """Return example deep tech companies (to be replaced with real search)"""
-        return [
-            # Autonomous Vehicles / Robotics
-            {
-                'name': 'Wayve',
-                'url': 'https://wayve.ai',
-                'career_page_url': 'https://wayve.ai/careers',
-                'company_type': 'company',
-                'industry': 'Autonomous Vehicles',
-                'location': 'London',
-                'funding_stage': 'Series C',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Oxbotica',
-                'url': 'https://www.oxbotica.com',
-                'career_page_url': 'https://www.oxbotica.com/careers',
-                'company_type': 'company',
-                'industry': 'Autonomous Vehicles',
-                'location': 'Oxford, UK',
-                'funding_stage': 'Series C',
-                'source': 'discovery'
-            },
-            {
-                'name': 'FiveAI',
-                'url': 'https://five.ai',
-                'career_page_url': 'https://five.ai/careers',
-                'company_type': 'company',
-                'industry': 'Autonomous Vehicles',
-                'location': 'London',
-                'funding_stage': 'Series B',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Arrival',
-                'url': 'https://arrival.com',
-                'career_page_url': 'https://arrival.com/careers',
-                'company_type': 'company',
-                'industry': 'Electric Vehicles',
-                'location': 'London',
-                'funding_stage': 'Public',
-                'source': 'discovery'
-            },
-            # AI Hardware / Semiconductors
-            {
-                'name': 'Graphcore',
-                'url': 'https://www.graphcore.ai',
-                'career_page_url': 'https://www.graphcore.ai/jobs',
-                'company_type': 'company',
-                'industry': 'AI Hardware',
-                'location': 'Bristol, UK',
-                'funding_stage': 'Series E',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Arm',
-                'url': 'https://www.arm.com',
-                'career_page_url': 'https://careers.arm.com',
-                'company_type': 'company',
-                'industry': 'Semiconductors',
-                'location': 'Cambridge, UK',
-                'funding_stage': 'Public',
-                'source': 'discovery'
-            },
-            {
-                'name': 'PragmatIC Semiconductor',
-                'url': 'https://www.pragmaticsemi.com',
-                'career_page_url': 'https://www.pragmaticsemi.com/careers',
-                'company_type': 'company',
-                'industry': 'Semiconductors',
-                'location': 'Cambridge, UK',
-                'funding_stage': 'Series D',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Sondrel',
-                'url': 'https://www.sondrel.com',
-                'career_page_url': 'https://www.sondrel.com/careers',
-                'company_type': 'company',
-                'industry': 'Semiconductors',
-                'location': 'London',
-                'funding_stage': 'Established',
-                'source': 'discovery'
-            },
-            # AI / Deep Learning Scale-ups
-            {
-                'name': 'DeepMind',
-                'url': 'https://www.deepmind.com',
-                'career_page_url': 'https://www.deepmind.com/careers',
-                'company_type': 'company',
-                'industry': 'AI Research',
-                'location': 'London',
-                'funding_stage': 'Google',
-                'source': 'discovery'
-            },
-            {
-                'name': 'BenevolentAI',
-                'url': 'https://www.benevolent.com',
-                'career_page_url': 'https://www.benevolent.com/careers',
-                'company_type': 'company',
-                'industry': 'AI Drug Discovery',
-                'location': 'London',
-                'funding_stage': 'Public',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Faculty',
-                'url': 'https://faculty.ai',
-                'career_page_url': 'https://faculty.ai/careers',
-                'company_type': 'company',
-                'industry': 'AI Consultancy',
-                'location': 'London',
-                'funding_stage': 'Series B',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Synthesia',
-                'url': 'https://www.synthesia.io',
-                'career_page_url': 'https://www.synthesia.io/careers',
-                'company_type': 'company',
-                'industry': 'AI Video',
-                'location': 'London',
-                'funding_stage': 'Series C',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Tractable',
-                'url': 'https://tractable.ai',
-                'career_page_url': 'https://tractable.ai/careers',
-                'company_type': 'company',
-                'industry': 'AI for Insurance',
-                'location': 'London',
-                'funding_stage': 'Series E',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Darktrace',
-                'url': 'https://www.darktrace.com',
-                'career_page_url': 'https://www.darktrace.com/careers',
-                'company_type': 'company',
-                'industry': 'AI Cybersecurity',
-                'location': 'Cambridge, UK',
-                'funding_stage': 'Public',
-                'source': 'discovery'
-            },
-            {
-                'name': 'Improbable',
-                'url': 'https://www.improbable.io',
-                'career_page_url': 'https://www.improbable.io/careers',
-                'company_type': 'company',
-                'industry': 'Metaverse/Simulation',
-                'location': 'London',
-                'funding_stage': 'Series B',
-                'source': 'discovery'
-            }
-        ]
+        return list(_EXAMPLE_COMPANIES)
 
     def find_career_page(self, company_url: str) -> str:
         """
         Find the career/jobs page URL for a company
 
-        TODO: Implement smart career page discovery
-        Common patterns: /careers, /jobs, /join-us, /team, /work-with-us
+        Probes common patterns (/careers, /jobs, /join-us, ...) concurrently
+        and returns the first in that order that responds, falling back to
+        /careers. Found pages are remembered for the life of this instance.
         """
-        common_paths = ['/careers', '/jobs', '/join-us', '/team', '/work-with-us', '/opportunities']
+        base_url = company_url.rstrip('/')
+        if base_url in self._career_pages:
+            return self._career_pages[base_url]
+
+        with ThreadPoolExecutor(max_workers=len(_CAREER_PATHS)) as executor:
+            responses = list(executor.map(lambda path: self._probe(base_url + path), _CAREER_PATHS))
+
+        for career_url in responses:
+            if career_url:
+                self._career_pages[base_url] = career_url
+                return career_url
 
-        for path in common_paths:
-            career_url = company_url.rstrip('/') + path
-            # TODO: Check if URL exists
-            # For now, just return first pattern
-            return career_url
+        return base_url + _CAREER_PATHS[0]
 
-        return company_url
+    def _probe(self, url: str) -> Optional[str]:
+        """HEAD a URL, returning its final URL if it responds below 400"""
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=HTTP_TIMEOUT_SECONDS)
+        except requests.RequestException:
+            return None
+        return response.url if response.status_code < 400 else None
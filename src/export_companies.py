@@ -9,6 +9,24 @@ from pathlib import Path
 from datetime import datetime
 
 
+EXPORT_BUFFER_BYTES = 1 << 20  # 1 MiB, same as export_sheets
+
+
+def _company_row(company: Dict) -> tuple:
+    """Build one CSV row for a company (in export_companies_directory column order)"""
+    return (
+        company.get('name', ''),
+        company.get('description', '')[:200] if company.get('description') else '',  # Limit to 200 chars
+        company.get('industry', ''),
+        company.get('location', ''),
+        company.get('url', ''),
+        company.get('career_page_url', ''),
+        company.get('funding_stage', ''),
+        company.get('company_type', ''),
+        company.get('last_scraped', company.get('discovered_date', ''))
+    )
+
+
 def export_companies_directory(companies: List[Dict], output_file: str = "output/companies_directory.csv") -> Path:
     """
     Export companies to directory CSV format (one row per company)
@@ -40,22 +58,11 @@ def export_companies_directory(companies: List[Dict], output_file: str = "output
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)  # Ensure output dir exists
 
-    with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for company in companies:
-            writer.writerow({
-                'Company Name': company.get('name', ''),
-                'Description': company.get('description', '')[:200] if company.get('description') else '',  # Limit to 200 chars
-                'Industry': company.get('industry', ''),
-                'Location': company.get('location', ''),
-                'Website': company.get('url', ''),
-                'Careers Page': company.get('career_page_url', ''),
-                'Funding Stage': company.get('funding_stage', ''),
-                'Type': company.get('company_type', ''),
-                'Last Checked': company.get('last_scraped', company.get('discovered_date', ''))
-            })
+    with open(output_path, 'w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_BYTES) as csvfile:
+        # Plain writer with positional rows - no per-row dict to build and look up
+        writer = csv.writer(csvfile)
+        writer.writerow(fieldnames)
+        writer.writerows(_company_row(company) for company in companies)
 
     print(f"\nOK: Exported {len(companies)} companies to: {output_path.absolute()}")
     print(f"\nTo import to Google Sheets:")
@@ -7,6 +7,46 @@ import csv
 from typing import List, Dict
 from pathlib import Path
 
+# Optional: orjson parses the stored AI analyses several times faster
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+EXPORT_BUFFER_BYTES = 1 << 20  # 1 MiB write buffer - far fewer write() calls on large exports
+
+
+def _parse_analysis(raw: str) -> Dict:
+    """Parse a stored ai_analysis JSON string ({} if missing or invalid)"""
+    if not raw:
+        return {}
+    try:
+        return _json_loads(raw)
+    except ValueError:  # json and orjson decode errors both subclass ValueError
+        return {}
+
+
+def _job_row(job: Dict) -> tuple:
+    """Build one CSV row for a job (in export_to_csv column order)"""
+    analysis = _parse_analysis(job.get('ai_analysis'))
+
+    return (
+        job['id'],
+        job['relevance_score'],
+        job['title'],
+        job.get('company_name', ''),
+        job.get('industry', ''),
+        job.get('location', ''),
+        job.get('role_type', '').upper(),
+        job['status'],
+        job['url'],
+        analysis.get('recommendation', '').upper(),
+        analysis.get('reasoning', ''),
+        job.get('discovered_date', ''),
+        job.get('applied_date', ''),
+        job.get('notes', '')
+    )
+
 
 def export_to_csv(jobs: List[Dict], output_file: str = "output/jobs_export.csv"):
     """
@@ -41,36 +81,11 @@ def export_to_csv(jobs: List[Dict], output_file: str = "output/jobs_export.csv")
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)  # Ensure output dir exists
 
-    with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for job in jobs:
-            # Parse AI analysis if available
-            import json
-            analysis = {}
-            if job.get('ai_analysis'):
-                try:
-                    analysis = json.loads(job['ai_analysis'])
-                except:
-                    pass
-
-            writer.writerow({
-                'ID': job['id'],
-                'Score': job['relevance_score'],
-                'Title': job['title'],
-                'Company': job.get('company_name', ''),
-                'Industry': job.get('industry', ''),
-                'Location': job.get('location', ''),
-                'Role Type': job.get('role_type', '').upper(),
-                'Status': job['status'],
-                'URL': job['url'],
-                'Recommendation': analysis.get('recommendation', '').upper(),
-                'Reasoning': analysis.get('reasoning', ''),
-                'Discovered Date': job.get('discovered_date', ''),
-                'Applied Date': job.get('applied_date', ''),
-                'Notes': job.get('notes', '')
-            })
+    with open(output_path, 'w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_BYTES) as csvfile:
+        # Plain writer with positional rows - no per-row dict to build and look up
+        writer = csv.writer(csvfile)
+        writer.writerow(fieldnames)
+        writer.writerows(_job_row(job) for job in jobs)
 
     print(f"\nOK: Exported {len(jobs)} jobs to: {output_path.absolute()}")
     print(f"\nTo import to Google Sheets:")
@@ -3,11 +3,27 @@ LinkedIn Job Search Module
 Searches LinkedIn for jobs matching criteria using Firecrawl
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict
 import re
 from urllib.parse import quote
 
 
+SEARCH_MAX_CONCURRENCY = 2  # Parallel Firecrawl scrapes per multi-query search (LinkedIn rate-limits hard)
+
+# LinkedIn job URLs contain /jobs/view/
+_JOB_LINK_RE = re.compile(r'\[(.*?)\]\((https://[^)]*linkedin\.com/jobs/view/[^)]+)\)')
+_LOCATION_KEYWORDS = ('London', 'UK', 'United Kingdom', 'Remote', 'Cambridge', 'Bristol')
+_LOCATION_RE = re.compile('|'.join(re.escape(loc) for loc in _LOCATION_KEYWORDS))  # One pass per line
+
+
+@lru_cache(maxsize=256)
+def _search_url(query: str, location: str) -> str:
+    """Build a LinkedIn Jobs search URL (cached - location repeats across queries)"""
+    return f"https://www.linkedin.com/jobs/search/?keywords={quote(query)}&location={quote(location)}&f_TPR=r604800"  # Jobs from last 7 days
+
+
 class LinkedInJobSearcher:
     """Searches LinkedIn for job postings using Firecrawl"""
 
@@ -36,22 +52,14 @@ class LinkedInJobSearcher:
             print("Firecrawl not enabled. Cannot search LinkedIn.")
             return []
 
-        # Build LinkedIn job search URL
-        encoded_query = quote(query)
-        encoded_location = quote(location)
-
-        # LinkedIn Jobs search URL format
-        search_url = f"https://www.linkedin.com/jobs/search/?keywords={encoded_query}&location={encoded_location}&f_TPR=r604800"  # Jobs from last 7 days
+        search_url = _search_url(query, location)
 
         print(f"Searching LinkedIn: '{query}' in '{location}'")
         print(f"URL: {search_url}")
 
         try:
             # Use Firecrawl to scrape the search results page
-            result = self.scraper.client.scrape(
-                search_url,
-                formats=['markdown']
-            )
+            result = self.scraper.scrape_with_retry(search_url)
 
             if not result or not hasattr(result, 'markdown') or not result.markdown:
                 print(f"Failed to scrape LinkedIn search results")
@@ -81,15 +89,16 @@ class LinkedInJobSearcher:
         jobs = []
         lines = markdown.split('\n')
 
-        # Look for job links - LinkedIn job URLs contain /jobs/view/
-        job_link_pattern = r'\[(.*?)\]\((https://[^)]*linkedin\.com/jobs/view/[^)]+)\)'
+        for i, line in enumerate(lines):
+            if len(jobs) >= limit:
+                break
 
-        i = 0
-        while i < len(lines) and len(jobs) < limit:
-            line = lines[i]
+            # Cheap substring check first - most lines aren't job links
+            if '/jobs/view/' not in line:
+                continue
 
             # Try to find job title link
-            match = re.search(job_link_pattern, line)
+            match = _JOB_LINK_RE.search(line)
             if match:
                 title = match.group(1).strip()
                 url = match.group(2).strip()
@@ -99,14 +108,14 @@ class LinkedInJobSearcher:
                 location = ''
 
                 # Look ahead for company and location info
-                for j in range(i + 1, min(i + 5, len(lines))):
-                    next_line = lines[j].strip()
+                for next_line in lines[i + 1:i + 5]:
+                    next_line = next_line.strip()
 
                     if not next_line or next_line.startswith('#') or next_line.startswith('['):
                         break
 
                     # Check if line looks like a location (contains city/country)
-                    if any(loc in next_line for loc in ['London', 'UK', 'United Kingdom', 'Remote', 'Cambridge', 'Bristol']):
+                    if _LOCATION_RE.search(next_line):
                         location = next_line
                     # Otherwise, assume it's company name if we haven't found one yet
                     elif not company and len(next_line) > 2:
@@ -120,31 +129,29 @@ class LinkedInJobSearcher:
                     'description': f'LinkedIn job posting: {title} at {company}'
                 })
 
-            i += 1
-
         return jobs
 
-    def search_multiple_queries(self, queries: List[str], location: str = "London, UK") -> List[Dict]:
+    def search_multiple_queries(self, queries: List[str], location: str = "London, UK", limit: int = 25,
+                                max_concurrency: int = SEARCH_MAX_CONCURRENCY) -> List[Dict]:
         """
         Search LinkedIn with multiple queries and combine results
 
+        Queries are scraped concurrently; results keep query order.
+
         Args:
             queries: List of search queries
             location: Location to search
+            limit: Max results per query
+            max_concurrency: Max searches in flight at once
 
         Returns:
             Combined list of unique jobs from all queries
         """
-        all_jobs = []
-        seen_urls = set()
-
-        for query in queries:
-            jobs = self.search_jobs(query, location, limit=25)
+        unique_jobs = {}  # Deduplicate by URL (first occurrence wins)
 
-            # Deduplicate by URL
-            for job in jobs:
-                if job['url'] not in seen_urls:
-                    all_jobs.append(job)
-                    seen_urls.add(job['url'])
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            for jobs in executor.map(lambda query: self.search_jobs(query, location, limit=limit), queries):
+                for job in jobs:
+                    unique_jobs.setdefault(job['url'], job)
 
-        return all_jobs
+        return list(unique_jobs.values())
@@ -4,38 +4,43 @@ Autonomous job discovery and matching for PM and VC roles in deep tech
 """
 
 import click
+import csv
+import os
+import sys
 import yaml
-from pathlib import Path
+from functools import lru_cache
 from rich.console import Console
 from rich.table import Table
 from rich import print as rprint
 import json
 
 from database import JobDatabase
-from discover import CompanyDiscovery
-from scrape import JobScraper
-from analyze import JobAnalyzer
-from notify import Notifier
-from export_sheets import export_to_csv, print_google_sheets_instructions
-from linkedin_search import LinkedInJobSearcher
-from export_companies import export_companies_directory
 
 
 console = Console()
 
+# libyaml's C loader is several times faster; same safe semantics as yaml.safe_load
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 def load_config(config_path: str = "config.yaml") -> dict:
     """Load configuration from YAML file"""
-    config_file = Path(config_path)
-
-    if not config_file.exists():
+    try:
+        mtime = os.stat(config_path).st_mtime
+    except FileNotFoundError:
         console.print(f"[red]Error: {config_path} not found![/red]")
         console.print("[yellow]Run: cp config.example.yaml config.yaml[/yellow]")
         console.print("[yellow]Then add your API keys to config.yaml[/yellow]")
         exit(1)
 
-    with open(config_file) as f:
-        return yaml.safe_load(f)
+    return _parse_config(config_path, mtime)
+
+
+@lru_cache(maxsize=1)
+def _parse_config(config_path: str, mtime: float) -> dict:
+    """Parse a config file (cached until its modification time changes)"""
+    with open(config_path) as f:
+        return yaml.load(f, Loader=_YAML_LOADER)
 
 
 @click.group()
@@ -45,24 +50,34 @@ def cli():
 
 
 @cli.command()
-def discover():
+@click.option('--batch', is_flag=True, default=False,
+              help='Analyze via the Message Batches API (50% cheaper, results can take minutes)')
+def discover(batch):
     """Discover companies and scrape job postings"""
+    # Imported per command so list/show/stats start without the pipeline modules
+    from discover import CompanyDiscovery
+    from scrape import JobScraper
+    from analyze import JobAnalyzer
+    from notify import Notifier
+
     config = load_config()
 
     console.print("\n[bold blue]AI Job Finder - Discovery Mode[/bold blue]\n")
 
     # Initialize components
     db = JobDatabase()
-    discovery = CompanyDiscovery(config)
-    scraper = JobScraper(config.get('firecrawl_api_key'), config)
-    analyzer = JobAnalyzer(config.get('anthropic_api_key'), config)
+    discovery = CompanyDiscovery(config, db=db)
+    scraper = JobScraper(config.get('firecrawl_api_key'), config, db=db)
+    analyzer = JobAnalyzer(config.get('anthropic_api_key'), config, db=db)
     notifier = Notifier(config)
 
     min_score = config.get('matching', {}).get('min_score', 70)
+    use_batch = batch or config.get('matching', {}).get('use_batch_api', False)
 
     # Step 1: Discover companies
     console.print("[yellow]Step 1: Discovering companies...[/yellow]")
     companies = discovery.discover_companies()
+    discovery.close()
     console.print(f"[green]OK: Found {len(companies)} companies[/green]\n")
 
     # Step 2: Scrape and analyze jobs
@@ -70,58 +85,70 @@ def discover():
 
     new_jobs = []
     total_scraped = 0
+    to_scrape = []  # (company, company_id, career_url)
+    scraped = []  # (company, company_id, job)
 
-    for company in companies:
-        console.print(f"  Checking {company['name']}...")
-
-        # Add company to database
-        company_id = db.add_company(
-            name=company['name'],
-            url=company.get('url'),
-            career_page_url=company.get('career_page_url'),
-            industry=company.get('industry'),
-            location=company.get('location'),
-            company_type=company.get('company_type'),
-            funding_stage=company.get('funding_stage')
-        )
+    # Add companies to database (one transaction)
+    company_ids = db.add_companies_bulk(companies)
 
-        # Scrape jobs
+    for company, company_id in zip(companies, company_ids):
         career_url = company.get('career_page_url') or company.get('url')
-        if not career_url:
-            continue
+        if career_url:
+            to_scrape.append((company, company_id, career_url))
 
-        jobs = scraper.scrape_career_page(career_url, company['name'])
+    # Scrape all career pages in Firecrawl batches
+    console.print(f"  Scraping {len(to_scrape)} career pages...")
+    page_jobs = scraper.scrape_career_pages_batch(
+        [(career_url, company['name']) for company, _, career_url in to_scrape]
+    )
+
+    for company, company_id, career_url in to_scrape:
+        jobs = page_jobs.get(career_url, [])
         total_scraped += len(jobs)
+        scraped.extend((company, company_id, job) for job in jobs)
+
+    db.update_companies_last_scraped([company_id for _, company_id, _ in to_scrape])
+
+    # Jobs already in the database can't be new matches - skip analyzing them
+    existing_urls = db.get_existing_job_urls([job['url'] for _, _, job in scraped])
+    scraped = [item for item in scraped if item[2]['url'] not in existing_urls]
+
+    # Analyze each job
+    if use_batch:
+        console.print(f"  Submitting {len(scraped)} jobs to the Message Batches API...")
+        analyses = analyzer.analyze_jobs_batch([(job, company) for company, _, job in scraped])
+    else:
+        analyses = analyzer.analyze_jobs(
+            [(job, company) for company, _, job in scraped],
+            max_concurrency=config.get('matching', {}).get('max_concurrency', 16)
+        )
 
-        # Analyze each job
-        for job in jobs:
-            analysis = analyzer.analyze_job(job, company)
-
-            # Only save jobs meeting minimum score
-            if analysis['score'] >= min_score:
-                job_id = db.add_job(
-                    company_id=company_id,
-                    title=job['title'],
-                    url=job['url'],
-                    description=job.get('description'),
-                    location=job.get('location'),
-                    role_type=analysis['role_type'],
-                    relevance_score=analysis['score'],
-                    ai_analysis=analysis
-                )
-
-                if job_id:  # New job (not duplicate)
-                    new_jobs.append({
-                        'id': job_id,
-                        'title': job['title'],
-                        'company_name': company['name'],
-                        'location': job.get('location'),
-                        'url': job['url'],
-                        'relevance_score': analysis['score'],
-                        'ai_analysis': json.dumps(analysis)
-                    })
-
-        db.update_company_last_scraped(company_id)
+    # Only save jobs meeting minimum score (one transaction)
+    matches = [(company, company_id, job, analysis)
+               for (company, company_id, job), analysis in zip(scraped, analyses)
+               if analysis['score'] >= min_score]
+    job_ids = db.add_jobs_bulk([{
+        'company_id': company_id,
+        'title': job['title'],
+        'url': job['url'],
+        'description': job.get('description'),
+        'location': job.get('location'),
+        'role_type': analysis['role_type'],
+        'relevance_score': analysis['score'],
+        'ai_analysis': analysis
+    } for _, company_id, job, analysis in matches])
+
+    for (company, _, job, analysis), job_id in zip(matches, job_ids):
+        if job_id:  # New job (not duplicate)
+            new_jobs.append({
+                'id': job_id,
+                'title': job['title'],
+                'company_name': company['name'],
+                'location': job.get('location'),
+                'url': job['url'],
+                'relevance_score': analysis['score'],
+                'ai_analysis': analysis
+            })
 
     console.print(f"\n[green]OK: Scraped {total_scraped} jobs from {len(companies)} companies[/green]")
     console.print(f"[green]OK: Found {len(new_jobs)} new high-quality matches (score >= {min_score})[/green]\n")
@@ -146,6 +173,10 @@ def discover():
 @click.option('--limit', default=50, help='Max results per query')
 def linkedin(location, limit):
     """Search LinkedIn for PM/VC jobs in deep tech"""
+    from scrape import JobScraper
+    from analyze import JobAnalyzer
+    from linkedin_search import LinkedInJobSearcher
+
     config = load_config()
 
     console.print("\n[bold blue]AI Job Finder - LinkedIn Search Mode[/bold blue]\n")
@@ -153,37 +184,35 @@ def linkedin(location, limit):
     # Initialize components
     db = JobDatabase()
     scraper = JobScraper(config.get('firecrawl_api_key'), config)
-    analyzer = JobAnalyzer(config.get('anthropic_api_key'), config)
+    analyzer = JobAnalyzer(config.get('anthropic_api_key'), config, db=db)
     linkedin = LinkedInJobSearcher(scraper)
 
     min_score = config.get('matching', {}).get('min_score', 70)
 
-    # Build search queries from config roles and industries
+    # Build search queries from config roles (first 5 to avoid too many searches)
     roles = config.get('criteria', {}).get('roles', [])
-    industries_keywords = ['deep tech', 'robotics', 'AI hardware', 'semiconductors', 'autonomous vehicles']
-
-    # Create search queries combining roles with industries
-    search_queries = []
-    for role in roles[:5]:  # Limit to first 5 roles to avoid too many searches
-        # Add role + "deep tech" query
-        search_queries.append(f"{role} deep tech")
+    search_queries = [f"{role} deep tech" for role in roles[:5]]
 
     console.print(f"[yellow]Searching LinkedIn for {len(search_queries)} queries in {location}...[/yellow]\n")
 
     # Search LinkedIn
-    all_jobs = linkedin.search_multiple_queries(search_queries, location)
+    all_jobs = linkedin.search_multiple_queries(search_queries, location, limit=limit)
 
     console.print(f"\n[green]Found {len(all_jobs)} total jobs from LinkedIn[/green]")
     console.print(f"[yellow]Analyzing and scoring jobs...[/yellow]\n")
 
-    # Analyze and save jobs
-    new_jobs = []
-    for job in all_jobs:
-        # Check if job already exists
-        existing = db.get_jobs(url=job['url'])
-        if existing:
-            continue
+    # Skip jobs already in the database (no LLM call for them)
+    existing_urls = db.get_existing_job_urls([job['url'] for job in all_jobs])
+    all_jobs = [job for job in all_jobs if job['url'] not in existing_urls]
 
+    analyses = analyzer.analyze_jobs(
+        [(job, {'name': job.get('company', 'Unknown Company')}) for job in all_jobs],
+        max_concurrency=config.get('matching', {}).get('max_concurrency', 16)
+    )
+
+    # Save jobs
+    new_jobs = []
+    for job, analysis in zip(all_jobs, analyses):
         # Create or get company
         company_name = job.get('company', 'Unknown Company')
         company_id = db.add_company(
@@ -193,8 +222,6 @@ def linkedin(location, limit):
             industry='Unknown'  # Could extract from job description later
         )
 
-        # Analyze job
-        analysis = analyzer.analyze_job(job, {'name': company_name})
         relevance_score = analysis['score']
 
         # Only save jobs above minimum score
@@ -240,16 +267,28 @@ def linkedin(location, limit):
 @click.option('--limit', default=50, help='Maximum number of jobs to show')
 def list(status, min_score, role_type, limit):
     """List matched jobs"""
-    config = load_config()
     db = JobDatabase()
 
-    jobs = db.get_jobs(status=status, min_score=min_score, role_type=role_type, limit=limit)
+    jobs = db.get_jobs(status=status, min_score=min_score, role_type=role_type, limit=limit,
+                       include_description=False)
 
     if not jobs:
         console.print("[yellow]No jobs found matching your criteria[/yellow]")
         db.close()
         return
 
+    # Piped output: skip Rich's table layout and write tab-separated rows
+    if not console.is_terminal:
+        writer = csv.writer(sys.stdout, delimiter='\t', lineterminator='\n')
+        writer.writerow(('id', 'score', 'title', 'company', 'location', 'status'))
+        writer.writerows(
+            (job['id'], job['relevance_score'], job['title'], job['company_name'],
+             job['location'] or '', job['status'])
+            for job in jobs
+        )
+        db.close()
+        return
+
     # Create table
     table = Table(title=f"Matched Jobs ({len(jobs)} results)")
     table.add_column("ID", style="cyan", width=6)
@@ -279,7 +318,6 @@ def list(status, min_score, role_type, limit):
 @click.argument('job_id', type=int)
 def show(job_id):
     """Show detailed information about a job"""
-    config = load_config()
     db = JobDatabase()
 
     job = db.get_job_by_id(job_id)
@@ -333,7 +371,6 @@ def show(job_id):
 @click.option('--notes', default=None, help='Add notes')
 def update(job_id, status, notes):
     """Update job application status"""
-    config = load_config()
     db = JobDatabase()
 
     job = db.get_job_by_id(job_id)
@@ -355,7 +392,6 @@ def update(job_id, status, notes):
 @cli.command()
 def stats():
     """Show database statistics"""
-    config = load_config()
     db = JobDatabase()
 
     stats_data = db.get_stats()
@@ -376,10 +412,11 @@ def stats():
 @click.option('--status', default=None, help='Filter by status')
 def export(output, min_score, status):
     """Export jobs to CSV for Google Sheets import"""
-    config = load_config()
+    from export_sheets import export_to_csv
+
     db = JobDatabase()
 
-    jobs = db.get_jobs(status=status, min_score=min_score, limit=1000)
+    jobs = db.get_jobs(status=status, min_score=min_score, limit=1000, include_description=False)
 
     if not jobs:
         console.print("[yellow]No jobs found to export[/yellow]")
@@ -410,7 +447,8 @@ def export(output, min_score, status):
 @click.option('--output', default='output/companies_directory.csv', help='Output CSV filename')
 def companies(type, industry, output):
     """Export discovered companies to directory format"""
-    config = load_config()
+    from export_companies import export_companies_directory
+
     db = JobDatabase()
 
     # Get all companies from database
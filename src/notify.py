@@ -3,6 +3,7 @@ Notification Module
 Sends notifications about new jobs via email, CLI, or Slack
 """
 
+import json
 from typing import List, Dict
 from datetime import datetime
 
@@ -40,9 +41,12 @@ class Notifier:
 
     def _print_console_digest(self, jobs: List[Dict]):
         """Print job digest to console"""
-        print("\n" + "="*80)
-        print(f"  NEW JOB MATCHES - {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-        print("="*80 + "\n")
+        # Build the whole digest and write it once rather than print() per line
+        lines = [
+            "\n" + "="*80,
+            f"  NEW JOB MATCHES - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+            "="*80 + "\n"
+        ]
 
         for i, job in enumerate(jobs, 1):
             score = job.get('relevance_score', 0)
@@ -53,26 +57,28 @@ class Notifier:
             location = job.get('location', 'Not specified').encode('ascii', 'ignore').decode('ascii')
             url = job.get('url', 'N/A').encode('ascii', 'ignore').decode('ascii')
 
-            print(f"{i}. [{score}/100] {title}")
-            print(f"   Company: {company}")
-            print(f"   Location: {location}")
-            print(f"   URL: {url}")
+            lines.append(f"{i}. [{score}/100] {title}")
+            lines.append(f"   Company: {company}")
+            lines.append(f"   Location: {location}")
+            lines.append(f"   URL: {url}")
 
-            # Parse AI analysis if available
+            # AI analysis if available (dict from the analyzer, or a JSON string from the database)
             analysis = job.get('ai_analysis')
             if analysis and isinstance(analysis, str):
                 try:
-                    import json
                     analysis = json.loads(analysis)
-                    print(f"   Reason: {analysis.get('reasoning', 'N/A')}")
-                except:
-                    pass
+                except ValueError:
+                    analysis = None
+            if isinstance(analysis, dict):
+                lines.append(f"   Reason: {analysis.get('reasoning', 'N/A')}")
 
-            print()
+            lines.append("")
 
-        print("="*80)
-        print(f"Total: {len(jobs)} new job(s)")
-        print("="*80 + "\n")
+        lines.append("="*80)
+        lines.append(f"Total: {len(jobs)} new job(s)")
+        lines.append("="*80 + "\n")
+
+        print("\n".join(lines))
 
     def _send_email_digest(self, jobs: List[Dict], email: str):
         """
@@ -3,34 +3,173 @@ Web Scraping Module using Firecrawl
 Scrapes career pages and extracts job postings
 """
 
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlparse
+import importlib.util
+import json
 import re
+import threading
+import time
+
+import requests
+
+
+DEFAULT_BATCH_SIZE = 100  # Career pages per Firecrawl batch scrape request
+SCRAPE_MAX_CONCURRENCY = 8  # Single-page scrapes in flight at once (batch fallbacks)
+RETRY_BASE_DELAY_SECONDS = 2.0  # Doubles after each failed attempt
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+# Errors without an HTTP status that are still worth retrying (network hiccups, timeouts)
+TRANSIENT_ERRORS = (requests.Timeout, requests.ConnectionError, TimeoutError, ConnectionError)
+DOMAIN_MIN_INTERVAL_SECONDS = 1.5  # Politeness gap between requests to the same host
+CONDITIONAL_TIMEOUT_SECONDS = 10  # HEAD request checking whether a career page changed
+PAGE_CACHE_TTL_SECONDS = 86400  # Re-scrape after this even if validators match (JS-rendered listings)
+
+# Job extraction patterns, compiled once rather than per page
+_LINK_RE = re.compile(r'\[(.*?)\]\((https?://[^\)]+)\)', re.DOTALL)  # [Title\n\nDept Location](URL)
+# One pass over a title: drop "Multiple Vacancies Available..." noise, turn escaped
+# "\n"/"\r" text and whitespace runs into spaces
+_TITLE_CLEAN_RE = re.compile(r'((?i:Multiple Vacancies Available).*$)|\\[nr]|\s+')
+_LOCATION_RE = re.compile(r'(London|Cambridge|Bristol|Remote|UK|United States|Austin|Bengaluru|[A-Z][a-z]+,\s*[A-Z]{2})')
+_HEADING_RE = re.compile(r'^#+\s+')
+_PAREN_URL_RE = re.compile(r'\((https?://[^\)]+)\)')
+
+# Role words that mark a job title; substring matches, so "engineering" counts as "engineer"
+_ROLE_RE = re.compile('|'.join((
+    'manager', 'engineer', 'analyst', 'associate', 'director', 'lead',
+    'product', 'software', 'hardware', 'data', 'designer', 'researcher',
+    'scientist', 'architect', 'developer', 'specialist', 'coordinator',
+    'principal', 'senior', 'junior', 'staff', 'intern'
+)))
+_MIN_ROLE_LEN = 4  # Shortest role words: "lead", "data"
+
+# Substring alternations: one scan per link part / heading-section line
+_LINK_LOCATION_RE = re.compile('UK|US|United States|Remote|London|Cambridge|Bristol|Austin|Bengaluru')
+_LINK_DEPARTMENT_RE = re.compile('Engineering|Research|Operations')
+_LINE_LOCATION_RE = re.compile('Location:|Remote|London|UK|Cambridge')
+
+# Mock postings returned when Firecrawl is not configured ({company}/{slug} filled per company)
+_VC_MOCK_JOBS = (
+    {
+        'title': 'Investment Associate - Deep Tech',
+        'description': 'Join {company} as an Investment Associate focusing on deep tech investments including robotics, AI hardware, and semiconductors.',
+        'url': 'https://example.com/{slug}/jobs/associate',
+        'location': 'London, UK'
+    },
+    {
+        'title': 'Venture Capital Analyst',
+        'description': '{company} is looking for an analyst to support our deep tech investment thesis.',
+        'url': 'https://example.com/{slug}/jobs/analyst',
+        'location': 'London, UK'
+    }
+)
+_COMPANY_MOCK_JOBS = (
+    {
+        'title': 'Senior Product Manager - Hardware',
+        'description': 'Lead product development at {company} for our next-generation hardware platform.',
+        'url': 'https://example.com/{slug}/jobs/pm-hardware',
+        'location': 'London, UK / Remote'
+    },
+    {
+        'title': 'Technical Product Manager - Robotics',
+        'description': '{company} is seeking a technical PM with robotics or hardware experience.',
+        'url': 'https://example.com/{slug}/jobs/pm-robotics',
+        'location': 'Remote'
+    }
+)
+
+
+@lru_cache(maxsize=4096)
+def _is_job_title(text: str) -> bool:
+    """Check if text looks like a job title (cached: boards repeat titles across sections)"""
+    if len(text) < _MIN_ROLE_LEN:
+        return False  # Too short to contain any role word ("Home", "EN", "→")
+    return _ROLE_RE.search(text.lower()) is not None
+
+
+def _clean_title(title: str) -> str:
+    """Strip vacancy-count noise and escaped newlines from a link title, normalizing whitespace"""
+    return ' '.join(_TITLE_CLEAN_RE.sub(lambda m: '' if m.group(1) else ' ', title).split())
+
+
+def _retry_after(error: Optional[Exception]) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After header on the error's response), if any"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    value = headers.get('Retry-After') or headers.get('X-RateLimit-Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None  # HTTP-date form, fall back to exponential backoff
+
+
+def _url_key(url: str) -> str:
+    """
+    Loose URL identity for matching batch results
+
+    Ignores scheme, host case, "www.", trailing slash and fragment. Path and
+    query keep their case (job boards treat /jobs/Engineering and
+    /jobs/engineering as different pages).
+    """
+    parts = urlparse(url.strip())
+    host = parts.netloc.lower()
+    host = host[4:] if host.startswith('www.') else host
+    return f"{host}{parts.path.rstrip('/')}?{parts.query}"
+
+
+def _interleave_by_domain(pages: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Reorder (url, company_name) pages round-robin across hosts so no host gets a burst"""
+    by_domain: Dict[str, List[Tuple[str, str]]] = {}
+    for page in pages:
+        by_domain.setdefault(urlparse(page[0]).netloc.lower(), []).append(page)
+
+    buckets = list(by_domain.values())
+    longest = max((len(bucket) for bucket in buckets), default=0)
+    return [bucket[i] for i in range(longest) for bucket in buckets if i < len(bucket)]
 
 
 class JobScraper:
     """Scrapes job postings from company career pages using Firecrawl"""
 
-    def __init__(self, api_key: str, config: Dict):
-        """Initialize Firecrawl client"""
+    def __init__(self, api_key: str, config: Dict, db=None):
+        """Initialize Firecrawl client (db enables conditional re-scrapes of career pages)"""
         self.api_key = api_key
         self.config = config
         self.scraping_config = config.get('scraping', {})
-
-        # Import Firecrawl only if API key is provided
+        self.db = db if self.scraping_config.get('conditional_requests', False) else None
+        self.page_cache_ttl = self.scraping_config.get('page_cache_ttl_seconds', PAGE_CACHE_TTL_SECONDS)
+        self.session = requests.Session() if self.db is not None else None
+        self.domain_interval = self.scraping_config.get('domain_delay_seconds', DOMAIN_MIN_INTERVAL_SECONDS)
+        self.max_concurrency = self.scraping_config.get('max_concurrency', SCRAPE_MAX_CONCURRENCY)
+
+        # Jobs per career page already scraped this run (companies can share a page, e.g. portfolio boards)
+        self._scraped: Dict[str, List[Dict]] = {}
+
+        # Next time each host may be requested (shared by threads, e.g. LinkedIn multi-query search)
+        self._next_request_at: Dict[str, float] = {}
+        self._domain_lock = threading.Lock()
+
+        # Firecrawl client is created on first use (see client); only check it's installed here
+        self._client = None
+        self._client_lock = threading.Lock()
         if api_key and api_key != "YOUR_FIRECRAWL_API_KEY_HERE":
-            try:
-                from firecrawl import FirecrawlApp
-                self.client = FirecrawlApp(api_key=api_key)
-                self.enabled = True
-            except ImportError:
+            self.enabled = importlib.util.find_spec('firecrawl') is not None
+            if not self.enabled:
                 print("Warning: firecrawl-py not installed. Run: pip install firecrawl-py")
-                self.client = None
-                self.enabled = False
         else:
-            self.client = None
             self.enabled = False
             print("Firecrawl API key not configured. Scraping disabled.")
 
+    @property
+    def client(self):
+        """Firecrawl client, imported and created on first use (None when scraping is disabled)"""
+        if self._client is None and self.enabled:
+            with self._client_lock:  # Batch fallbacks may reach here from several threads
+                if self._client is None:
+                    from firecrawl import FirecrawlApp
+                    self._client = FirecrawlApp(api_key=self.api_key)
+        return self._client
+
     def scrape_career_page(self, url: str, company_name: str = None) -> List[Dict]:
         """
         Scrape a company's career page and extract job postings
@@ -40,12 +179,23 @@ class JobScraper:
             print(f"Scraping disabled. Would scrape: {url}")
             return self._get_mock_jobs(company_name)
 
+        if url in self._scraped:
+            return self._scraped[url]
+
+        jobs, validators = self._check_unchanged(url)
+        if jobs is None:
+            jobs = self._scrape_page(url)
+            self._remember_page(url, validators, jobs)
+
+        if jobs:
+            self._scraped[url] = jobs
+        return jobs
+
+    def _scrape_page(self, url: str) -> List[Dict]:
+        """Scrape one career page with Firecrawl and extract its jobs ([] on failure)"""
         try:
             # Use Firecrawl to scrape the page
-            result = self.client.scrape(
-                url,
-                formats=['markdown']
-            )
+            result = self.scrape_with_retry(url)
 
             if not result or not hasattr(result, 'markdown') or not result.markdown:
                 print(f"Failed to scrape {url}")
@@ -63,6 +213,166 @@ class JobScraper:
             print(f"Error scraping {url}: {str(e)}")
             return []
 
+    def scrape_with_retry(self, url: str):
+        """
+        Scrape a page to markdown, retrying with exponential backoff
+
+        Retries rate limits, 5xx errors, timeouts, connection errors and
+        empty pages (Firecrawl can return empty content when throttled), up
+        to scraping.retry_attempts times. Honours Retry-After when present.
+        Anything else (auth, bad request, SDK misconfiguration) is raised
+        immediately.
+        """
+        retries = self.scraping_config.get('retry_attempts', 3)
+
+        for attempt in range(retries + 1):
+            self._wait_for_domain(url)
+            error = None
+            try:
+                result = self.client.scrape(url, formats=['markdown'])
+                if result and getattr(result, 'markdown', None):
+                    return result
+            except Exception as e:
+                status = (getattr(getattr(e, 'response', None), 'status_code', None)
+                          or getattr(e, 'status_code', None))
+                retryable = (status in RETRYABLE_STATUS_CODES if status is not None
+                             else isinstance(e, TRANSIENT_ERRORS))
+                if attempt == retries or not retryable:
+                    raise
+                error = e
+
+            if attempt == retries:
+                return result  # Still empty after the last retry
+
+            delay = _retry_after(error) or RETRY_BASE_DELAY_SECONDS * 2 ** attempt
+            print(f"Retrying {url} in {delay:.0f}s...")
+            time.sleep(delay)
+
+    def _check_unchanged(self, url: str) -> Tuple[Optional[List[Dict]], Optional[Tuple[str, str]]]:
+        """
+        Conditional HEAD request against the validators stored for a career page
+
+        Returns (cached_jobs, None) when the server answers 304 Not Modified
+        and the stored jobs are younger than scraping.page_cache_ttl_seconds.
+        Otherwise returns (None, (etag, last_modified)) for the page's current
+        version, or (None, None) when it has no validators or the check fails.
+        The HEAD goes from our own IP, so it respects the per-host interval.
+        """
+        if self.db is None:
+            return None, None
+
+        cached = self.db.get_cached_page(url, self.page_cache_ttl)
+        headers = {}
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        self._wait_for_domain(url)
+        try:
+            response = self.session.head(url, headers=headers, timeout=CONDITIONAL_TIMEOUT_SECONDS,
+                                         allow_redirects=True)
+        except requests.RequestException:
+            return None, None
+
+        if cached and headers and response.status_code == 304:
+            print(f"Unchanged since last scrape: {url}")
+            return json.loads(cached['jobs']), None
+
+        validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return None, validators if response.ok and any(validators) else None
+
+    def _remember_page(self, url: str, validators: Optional[Tuple[str, str]], jobs: List[Dict]):
+        """Store a freshly scraped page's validators and jobs for the next conditional check"""
+        if validators and jobs:
+            self.db.save_cached_page(url, *validators, json.dumps(jobs))
+
+    def _wait_for_domain(self, url: str):
+        """Sleep until url's host is outside its politeness interval, then reserve the next slot"""
+        domain = urlparse(url).netloc.lower()
+        with self._domain_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_request_at.get(domain, now))
+            self._next_request_at[domain] = slot + self.domain_interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+    def scrape_career_pages_batch(self, pages: List[Tuple[str, str]]) -> Dict[str, List[Dict]]:
+        """
+        Scrape many career pages with Firecrawl's batch scrape endpoint
+
+        Args:
+            pages: List of (url, company_name) tuples
+
+        Returns:
+            Dict mapping each URL to its extracted jobs. Pages missing from a
+            batch result are re-scraped individually, several at a time
+            (per-host politeness still applies).
+        """
+        if not self.enabled:
+            return {url: self.scrape_career_page(url, company_name) for url, company_name in pages}
+
+        batch_size = self.scraping_config.get('batch_size', DEFAULT_BATCH_SIZE)
+
+        # Scrape each URL once, and not at all if this run already has it
+        unique_pages = {}
+        for url, company_name in pages:
+            unique_pages.setdefault(url, company_name)
+        results = {url: self._scraped[url] for url in unique_pages if url in self._scraped}
+
+        # Spread hosts shared by many companies (e.g. ATS boards)
+        pages = _interleave_by_domain([page for page in unique_pages.items() if page[0] not in results])
+
+        # Skip pages whose server confirms they haven't changed since the last scrape
+        validators = {}
+        if self.db is not None and pages:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(pages))) as executor:
+                checks = executor.map(lambda page: self._check_unchanged(page[0]), pages)
+                for (url, _), (cached_jobs, page_validators) in zip(pages, checks):
+                    if cached_jobs is not None:
+                        results[url] = cached_jobs
+                    else:
+                        validators[url] = page_validators
+            pages = [page for page in pages if page[0] not in results]
+
+        for start in range(0, len(pages), batch_size):
+            chunk = pages[start:start + batch_size]
+            urls = [url for url, _ in chunk]
+            print(f"Batch scraping {len(urls)} career pages...")
+
+            try:
+                batch = self.client.batch_scrape(urls, formats=['markdown'])
+                documents = getattr(batch, 'data', None) or []
+            except Exception as e:
+                print(f"Error batch scraping: {str(e)}")
+                documents = []
+
+            # Match documents back loosely: Firecrawl may report a redirected, re-cased or
+            # slash-normalized URL, and a miss here costs a second paid scrape below
+            requested = {_url_key(url): url for url in urls}
+            for document in documents:
+                metadata = getattr(document, 'metadata', None)
+                markdown = getattr(document, 'markdown', None)
+                url = next((requested[_url_key(candidate)]
+                            for candidate in (getattr(metadata, 'source_url', None), getattr(metadata, 'url', None))
+                            if candidate and _url_key(candidate) in requested), None)
+                if url and markdown and url not in results:
+                    results[url] = self._extract_jobs_from_markdown(markdown, url)
+                    print(f"Found {len(results[url])} jobs at {url}")
+
+            # Retry pages the batch failed on (invalid URLs, blocked, timed out) individually
+            missing = [url for url in urls if url not in results]
+            if missing:
+                with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(missing))) as executor:
+                    results.update(zip(missing, executor.map(self._scrape_page, missing)))
+
+            for url in urls:
+                self._remember_page(url, validators.get(url), results[url])
+
+        self._scraped.update((url, jobs) for url, jobs in results.items() if jobs)
+        return results
+
     def _extract_jobs_from_markdown(self, markdown: str, base_url: str) -> List[Dict]:
         """
         Extract job listings from markdown content
@@ -72,13 +382,15 @@ class JobScraper:
         2. Headings with job titles
         3. Greenhouse/Lever ATS systems
         """
+        # Every markdown link contains "](http": skip the DOTALL link scan on pages without one
+        if '](http' not in markdown:
+            return self._extract_by_headings(markdown, base_url)
+
         jobs = []
 
         # Pattern 1: Markdown links with job info
         # Example: [Senior ML Engineer\n\nEngineering - AI Bristol, UK](https://...)
-        link_pattern = r'\[(.*?)\]\((https?://[^\)]+)\)'
-
-        for match in re.finditer(link_pattern, markdown, re.DOTALL):
+        for match in _LINK_RE.finditer(markdown):
             link_text = match.group(1)
             url = match.group(2)
 
@@ -93,16 +405,11 @@ class JobScraper:
             if not parts:
                 continue
 
-            # First part is usually the title
-            title = parts[0]
-
-            # Clean up title - remove "Multiple Vacancies Available" and other noise
-            title = re.sub(r'Multiple Vacancies Available.*$', '', title, flags=re.IGNORECASE).strip()
-            title = re.sub(r'\\n|\\r', ' ', title).strip()  # Remove literal \n characters
-            title = re.sub(r'\s+', ' ', title)  # Normalize whitespace
+            # First part is usually the title, minus "Multiple Vacancies Available" and other noise
+            title = _clean_title(parts[0])
 
             # Check if this looks like a job title
-            if not self._is_job_title(title):
+            if not _is_job_title(title):
                 continue
 
             # Extract location from remaining parts
@@ -111,14 +418,14 @@ class JobScraper:
 
             for part in parts[1:]:
                 # Check if part contains location keywords
-                if any(loc in part for loc in ['UK', 'US', 'United States', 'Remote', 'London', 'Cambridge', 'Bristol', 'Austin', 'Bengaluru']):
+                if _LINK_LOCATION_RE.search(part):
                     location = part
-                elif 'Engineering' in part or 'Research' in part or 'Operations' in part:
+                elif _LINK_DEPARTMENT_RE.search(part):
                     department = part
 
             # If we didn't find location in parts, try to extract from full text
             if not location:
-                location_match = re.search(r'(London|Cambridge|Bristol|Remote|UK|United States|Austin|Bengaluru|[A-Z][a-z]+,\s*[A-Z]{2})', link_text)
+                location_match = _LOCATION_RE.search(link_text)
                 if location_match:
                     location = location_match.group(1)
 
@@ -131,51 +438,50 @@ class JobScraper:
 
         # Pattern 2: Fallback - Look for headings that might be job titles
         if len(jobs) == 0:
-            lines = markdown.split('\n')
-            current_job = None
-
-            for line in lines:
-                # Look for job titles in headings
-                if re.match(r'^#+\s+', line):
-                    title = re.sub(r'^#+\s+', '', line).strip()
-
-                    if self._is_job_title(title):
-                        if current_job:
-                            jobs.append(current_job)
-
-                        current_job = {
-                            'title': title,
-                            'description': '',
-                            'url': base_url,
-                            'location': ''
-                        }
-
-                # Look for URLs
-                elif current_job:
-                    url_match = re.search(r'\(https?://[^\)]+\)', line)
-                    if url_match:
-                        current_job['url'] = url_match.group(0)[1:-1]
-
-                    # Look for location
-                    if any(loc in line for loc in ['Location:', 'Remote', 'London', 'UK', 'Cambridge']):
-                        current_job['location'] = line.strip()
-
-            if current_job:
-                jobs.append(current_job)
+            jobs = self._extract_by_headings(markdown, base_url)
 
         return jobs
 
-    def _is_job_title(self, text: str) -> bool:
-        """Check if text looks like a job title"""
-        role_keywords = [
-            'manager', 'engineer', 'analyst', 'associate', 'director', 'lead',
-            'product', 'software', 'hardware', 'data', 'designer', 'researcher',
-            'scientist', 'architect', 'developer', 'specialist', 'coordinator',
-            'principal', 'senior', 'junior', 'staff', 'intern'
-        ]
+    def _extract_by_headings(self, markdown: str, base_url: str) -> List[Dict]:
+        """Fallback extraction: job-title headings, with URL/location from the lines below them"""
+        jobs = []
+        if '#' not in markdown:
+            return jobs  # No headings at all
+
+        lines = markdown.split('\n')
+        current_job = None
+
+        for line in lines:
+            # Look for job titles in headings
+            heading = _HEADING_RE.match(line)
+            if heading:
+                title = line[heading.end():].strip()
+
+                if _is_job_title(title):
+                    if current_job:
+                        jobs.append(current_job)
+
+                    current_job = {
+                        'title': title,
+                        'description': '',
+                        'url': base_url,
+                        'location': ''
+                    }
+
+            # Look for URLs
+            elif current_job:
+                url_match = _PAREN_URL_RE.search(line)
+                if url_match:
+                    current_job['url'] = url_match.group(1)
+
+                # Look for location
+                if _LINE_LOCATION_RE.search(line):
+                    current_job['location'] = line.strip()
+
+        if current_job:
+            jobs.append(current_job)
 
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in role_keywords)
+        return jobs
 
     def _get_mock_jobs(self, company_name: str = None) -> List[Dict]:
         """
@@ -185,33 +491,8 @@ class JobScraper:
             return []
 
         # Return different mock jobs based on company name
-        if 'vc' in company_name.lower() or 'capital' in company_name.lower():
-            return [
-                {
-                    'title': 'Investment Associate - Deep Tech',
-                    'description': f'Join {company_name} as an Investment Associate focusing on deep tech investments including robotics, AI hardware, and semiconductors.',
-                    'url': f'https://example.com/{company_name.lower().replace(" ", "-")}/jobs/associate',
-                    'location': 'London, UK'
-                },
-                {
-                    'title': 'Venture Capital Analyst',
-                    'description': f'{company_name} is looking for an analyst to support our deep tech investment thesis.',
-                    'url': f'https://example.com/{company_name.lower().replace(" ", "-")}/jobs/analyst',
-                    'location': 'London, UK'
-                }
-            ]
-        else:
-            return [
-                {
-                    'title': 'Senior Product Manager - Hardware',
-                    'description': f'Lead product development at {company_name} for our next-generation hardware platform.',
-                    'url': f'https://example.com/{company_name.lower().replace(" ", "-")}/jobs/pm-hardware',
-                    'location': 'London, UK / Remote'
-                },
-                {
-                    'title': 'Technical Product Manager - Robotics',
-                    'description': f'{company_name} is seeking a technical PM with robotics or hardware experience.',
-                    'url': f'https://example.com/{company_name.lower().replace(" ", "-")}/jobs/pm-robotics',
-                    'location': 'Remote'
-                }
-            ]
+        name_lower = company_name.lower()
+        templates = _VC_MOCK_JOBS if 'vc' in name_lower or 'capital' in name_lower else _COMPANY_MOCK_JOBS
+        slug = name_lower.replace(" ", "-")
+        return [{key: value.format(company=company_name, slug=slug) for key, value in job.items()}
+                for job in templates]